@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EncoderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'encoder'
+
+    def ready(self):
+        # Load and warm the configured models before traffic arrives; the
+        # readiness endpoint reports 503 until they are done.
+        config = settings.TRANSFORMER_SETTINGS.get('preload', {})
+        if config.get('enabled', False):
+            from .services.warmup import start_preload
+            start_preload(background=config.get('background', True))
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import List, Union
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
 
 class BaseEncoder(ABC):
     """Base class for text encoding implementations"""
@@ -34,3 +34,40 @@ class BaseEncoder(ABC):
         Returns:
             int: Dimension of encoded vectors
         """
+
+    def encode_iter(self,
+                    items: Iterable[Union[str, Tuple[Any, str]]],
+                    batch_size: Optional[int] = None) -> Iterator[Tuple[List[Any], np.ndarray]]:
+        """Lazily encode a stream of texts in fixed-size blocks
+
+        Only one block of texts and vectors is held at a time, so arbitrarily
+        large inputs such as ``Chunk.objects.values_list('id', 'chunk_txt').iterator()``
+        can be encoded with flat memory.
+
+        Args:
+            items (Iterable): Texts, or (id, text) pairs. Bare texts get their
+                position in the stream as id.
+            batch_size (int, optional): Texts per block; defaults to the
+                encoder's batch_size
+
+        Yields:
+            Tuple[List, np.ndarray]: Ids of the block and their vectors
+        """
+        batch_size = batch_size or getattr(self, 'batch_size', None) or 32
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        ids, texts = [], []
+        for position, item in enumerate(items):
+            if isinstance(item, str):
+                ids.append(position)
+                texts.append(item)
+            else:
+                item_id, text = item
+                ids.append(item_id)
+                texts.append(text)
+            if len(texts) == batch_size:
+                yield ids, self.encode_batch(texts)
+                ids, texts = [], []
+        if texts:
+            yield ids, self.encode_batch(texts)
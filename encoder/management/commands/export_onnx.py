@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from encoder.services.onnx_encoder import export_onnx
+from encoder.services.registry import registry
+
+
+class Command(BaseCommand):
+    help = "Export a configured transformer model to ONNX for the 'onnx' encoder backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_name', nargs='?',
+                            help="Model or alias from TRANSFORMER_SETTINGS; defaults to the default model")
+        parser.add_argument('--output', help="Target .onnx file; defaults to the model's onnx_path setting")
+
+    def handle(self, *args, **options):
+        try:
+            model_name = registry.resolve(options['model_name'])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        config = settings.TRANSFORMER_SETTINGS['models'].get(model_name, {})
+        path = export_onnx(model_name, options['output'] or config.get('onnx_path'))
+        self.stdout.write(self.style.SUCCESS(f"Exported {model_name} to {path}"))
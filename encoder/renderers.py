@@ -0,0 +1,71 @@
+'''Binary renderers for embedding matrices returned by the encoder API'''
+import io
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class EmbeddingRenderer(BaseRenderer):
+    """Base for renderers that write a numpy matrix as binary.
+
+    Anything that is not an ndarray (error payloads, exceptions handled by
+    DRF) is rendered as JSON instead, with the Content-Type fixed to match.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, np.ndarray):
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return JSONRenderer().render(data, 'application/json', renderer_context)
+        return self.render_matrix(data, renderer_context or {})
+
+    def render_matrix(self, matrix: np.ndarray, renderer_context: dict) -> bytes:
+        raise NotImplementedError
+
+
+class NpyRenderer(EmbeddingRenderer):
+    """NumPy .npy file; read with np.load(io.BytesIO(content))"""
+    media_type = 'application/x-npy'
+    format = 'npy'
+
+    def render_matrix(self, matrix, renderer_context):
+        buffer = io.BytesIO()
+        np.save(buffer, matrix, allow_pickle=False)
+        return buffer.getvalue()
+
+
+class OctetStreamRenderer(EmbeddingRenderer):
+    """Raw little-endian row-major bytes; shape and dtype go in response headers"""
+    media_type = 'application/octet-stream'
+    format = 'raw'
+
+    def render_matrix(self, matrix, renderer_context):
+        response = renderer_context.get('response')
+        if response is not None:
+            response['X-Embedding-Shape'] = ','.join(str(n) for n in matrix.shape)
+            response['X-Embedding-Dtype'] = matrix.dtype.name
+        return np.ascontiguousarray(matrix, dtype=matrix.dtype.newbyteorder('<')).tobytes()
+
+
+class MsgpackRenderer(EmbeddingRenderer):
+    """msgpack map of shape, dtype and the raw matrix bytes"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+
+    def render_matrix(self, matrix, renderer_context):
+        import msgpack
+        return msgpack.packb({
+            'shape': list(matrix.shape),
+            'dtype': matrix.dtype.name,
+            'data': np.ascontiguousarray(matrix, dtype=matrix.dtype.newbyteorder('<')).tobytes(),
+        })
+
+
+class EmbeddingJSONRenderer(JSONRenderer):
+    """Opt-in JSON fallback: {"encoded": [[...], ...]}"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, np.ndarray):
+            data = {'encoded': data.tolist()}
+        return super().render(data, accepted_media_type, renderer_context)
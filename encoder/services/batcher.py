@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
+import numpy as np
+from django.conf import settings
+from ..interfaces.base_encoder import BaseEncoder
+from .registry import registry
+
+EMPTY_INPUT_ERROR = "Input text cannot be empty or whitespace only"
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-text encode calls into encode_batch calls.
+
+    Callers block in encode() while a background thread collects up to
+    ``max_batch_size`` pending texts, or whatever arrived within
+    ``max_wait_ms`` of the first one, runs a single encode_batch and hands
+    every caller its own row.
+    """
+
+    def __init__(self,
+                 encoder: BaseEncoder,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: float = 5.0,
+                 timeout: Optional[float] = None):
+        """Initialize the batcher and start its worker thread.
+
+        Args:
+            encoder: Encoder whose encode_batch runs the coalesced batches
+            max_batch_size: Most texts per batch; defaults to the encoder's batch_size
+            max_wait_ms: Longest time the first text of a batch waits for company
+            timeout: Default seconds encode() waits for a vector; None waits forever
+        """
+        if max_batch_size is None:
+            max_batch_size = getattr(encoder, 'batch_size', 16)
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='encoder-microbatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for encoding and return a Future for its vector.
+
+        Raises:
+            ValueError: If input text is empty or whitespace only
+            RuntimeError: If the batcher has been closed
+        """
+        if not text or not text.strip():
+            raise ValueError(EMPTY_INPUT_ERROR)
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Encode a single text through the shared batch; blocks until done.
+
+        Args:
+            text: Text to encode
+            timeout: Seconds to wait; defaults to the batcher's timeout
+
+        Raises:
+            concurrent.futures.TimeoutError: If no vector arrived in time; the
+                text is dropped from the queue if it has not started yet
+        """
+        future = self.submit(text)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then let the worker loop see the stop marker.
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Skip callers that cancelled while waiting in the queue.
+            batch = [(text, future) for text, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.encoder.encode_batch([text for text, _ in batch])
+            except Exception as e:  # pylint: disable=broad-except
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+            for row, (_, future) in zip(vectors, batch):
+                future.set_result(row)
+
+    def stats(self) -> Dict[str, float]:
+        """Batch counters; fill_rate is the mean share of max_batch_size used."""
+        with self._stats_lock:
+            batches, items = self._batches, self._items
+        return {
+            'batches': batches,
+            'items': items,
+            'mean_batch_size': items / batches if batches else 0.0,
+            'fill_rate': items / (batches * self.max_batch_size) if batches else 0.0,
+        }
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting texts, drain what is queued and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model_name: Optional[str] = None) -> MicroBatcher:
+    """Return the process-wide batcher for a model's registry encoder.
+
+    Sizing comes from TRANSFORMER_SETTINGS['batcher'] ('max_batch_size',
+    'max_wait_ms', 'timeout'), falling back to the model's batch_size, 5 ms
+    and no timeout. The batcher is rebuilt whenever the registry hands out a
+    different encoder, and each call counts as a use of the model.
+    """
+    model_name = registry.resolve(model_name)
+    encoder = registry.get(model_name)
+    stale = None
+    with _batchers_lock:
+        batcher = _batchers.get(model_name)
+        if batcher is None or batcher.encoder is not encoder:
+            stale = batcher
+            config = settings.TRANSFORMER_SETTINGS.get('batcher', {})
+            batcher = MicroBatcher(
+                encoder,
+                max_batch_size=config.get('max_batch_size'),
+                max_wait_ms=config.get('max_wait_ms', 5.0),
+                timeout=config.get('timeout'),
+            )
+            _batchers[model_name] = batcher
+    if stale is not None:
+        stale.close(timeout=0)
+    return batcher
+
+
+def _drop_batcher(model_name: str) -> None:
+    """Close an evicted model's batcher so it stops holding the encoder."""
+    with _batchers_lock:
+        batcher = _batchers.pop(model_name, None)
+    if batcher is not None:
+        # Texts already queued are still encoded; the worker then exits
+        batcher.close(timeout=0)
+
+
+registry.on_evict(_drop_batcher)
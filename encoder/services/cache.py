@@ -0,0 +1,216 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+from ..interfaces.base_encoder import BaseEncoder
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry."""
+    return ' '.join(text.split())
+
+
+def encoding_variant(encoder: BaseEncoder) -> List[str]:
+    """Encoder settings that change its vectors: int8 weights, long-text windows, output stage."""
+    parts = []
+    if getattr(encoder, 'quantized', False):
+        parts.append('int8')
+    if getattr(encoder, 'long_text', 'truncate') != 'truncate':
+        # Inputs past the model limit are pooled over windows instead of cut off
+        parts.append(f"{encoder.long_text}{encoder.window_overlap}")
+    output = getattr(encoder, 'output', None)
+    if output is not None:
+        parts.append(output.signature)
+    return parts
+
+
+class EmbeddingCache:
+    """Content-addressed vector store with an in-process LRU and an SQLite tier.
+
+    Vectors keep their dtype and are stored under a key derived from the model
+    name, model revision and normalized text. The SQLite tier is optional and
+    survives restarts; entries found there are promoted into the LRU.
+    """
+
+    def __init__(self, max_items: int = 10000, path: Optional[Union[str, Path]] = None):
+        """Initialize the cache.
+
+        Args:
+            max_items: Capacity of the in-memory LRU
+            path: SQLite file for the persistent tier; None keeps memory only
+        """
+        if max_items <= 0:
+            raise ValueError("max_items must be positive")
+        self.max_items = max_items
+        self.path = Path(path) if path else None
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model_name: str, revision: str, text: str) -> str:
+        payload = '\x00'.join((model_name, revision or '', normalize_text(text)))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Look up keys; returns only the ones found. Updates hit/miss counters."""
+        found = {}
+        pending = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    pending.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = vector
+                self.memory_hits += 1
+
+            if pending and self._db is not None:
+                for start in range(0, len(pending), 500):
+                    part = pending[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part
+                    ).fetchall()
+                    for key, dtype, blob in rows:
+                        vector = np.frombuffer(blob, dtype=dtype)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+            self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors under their keys in both tiers."""
+        with self._lock:
+            rows = []
+            for key, vector in items.items():
+                vector = np.array(vector)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                rows.append((key, vector.dtype.name, vector.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dtype, vector) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+            }
+
+    def clear(self) -> None:
+        """Empty both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class CachedEncoder(BaseEncoder):
+    """Wraps an encoder so repeated texts are served from an EmbeddingCache."""
+
+    def __init__(self, encoder: BaseEncoder, cache: EmbeddingCache,
+                 model_name: Optional[str] = None, revision: str = 'main'):
+        """Initialize the wrapper.
+
+        Args:
+            encoder: Encoder that computes vectors on a cache miss
+            cache: Cache shared by every encoder of the process
+            model_name: Key namespace; defaults to encoder.model_name
+            revision: Model revision, so retrained weights never reuse old vectors;
+                the encoder's backend and encoding_variant are appended
+        """
+        self.encoder = encoder
+        self.cache = cache
+        self.model_name = model_name or getattr(encoder, 'model_name', type(encoder).__name__)
+        # Vectors from another backend, int8 weights, long-text mode or output
+        # stage must not be served for this encoder
+        parts = [revision]
+        backend = getattr(encoder, 'backend', None)
+        if backend:
+            parts.append(backend)
+        self.revision = '|'.join(parts + encoding_variant(encoder))
+        dimension = getattr(encoder, 'dimension', None)
+        self.dimension = dimension() if callable(dimension) else dimension
+
+    def __getattr__(self, name):
+        # Expose tokenizer, batch_size, device, ... of the wrapped encoder.
+        if name == 'encoder':
+            raise AttributeError(name)
+        return getattr(self.encoder, name)
+
+    def _key(self, text: str) -> str:
+        return self.cache.make_key(self.model_name, self.revision, text)
+
+    def encode_text(self, text: str) -> np.ndarray:
+        key = self._key(text) if text and text.strip() else None
+        if key is not None:
+            found = self.cache.get_many([key])
+            if key in found:
+                return found[key].copy()
+        vector = self.encoder.encode_text(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Serve cached rows and run encode_batch only on the distinct misses."""
+        if not texts:
+            return self.encoder.encode_batch(texts)
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.encoder.encode_batch(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+        return np.stack([found[key] for key in keys])
+
+    def dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, text: str):
+        return self.encode_text(text)
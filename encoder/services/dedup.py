@@ -0,0 +1,94 @@
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from ..interfaces.base_encoder import BaseEncoder
+from .cache import encoding_variant, normalize_text
+
+# Maps text hashes to vectors that are already stored, e.g. on Chunk rows
+StoredLookup = Callable[[List[str]], Dict[str, np.ndarray]]
+
+
+def text_hash(text: str, signature: str = '') -> str:
+    """sha256 of the signature and whitespace-normalized text, as stored in Chunk.text_hash."""
+    payload = normalize_text(text)
+    if signature:
+        payload = f"{signature}\x00{payload}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def vector_signature(encoder: BaseEncoder) -> str:
+    """Identifies what produces an encoder's vectors: model, backend and encoding_variant.
+
+    Stored vectors are only reused under the same signature, so a model,
+    quantization, long-text or PCA change never mixes incompatible vectors.
+    """
+    encoder = getattr(encoder, 'encoder', encoder)  # Unwrap CachedEncoder
+    parts = [getattr(encoder, 'model_name', ''), type(encoder).__name__]
+    return '|'.join(parts + encoding_variant(encoder))
+
+
+def _dimension(encoder: BaseEncoder) -> int:
+    dimension = getattr(encoder, 'dimension', None)
+    return dimension() if callable(dimension) else dimension
+
+
+def _valid_vectors(stored: Dict, dimension: int) -> Dict[str, np.ndarray]:
+    """Stored vectors that are numeric and of the encoder's dimension"""
+    valid = {}
+    for digest, vector in stored.items():
+        try:
+            vector = np.asarray(vector, dtype=np.float32)
+        except (TypeError, ValueError):
+            continue
+        if vector.shape == (dimension,):
+            valid[digest] = vector
+    return valid
+
+
+def encode_deduplicated(encoder: BaseEncoder,
+                        texts: List[str],
+                        lookup: Optional[StoredLookup] = None) -> Tuple[np.ndarray, Dict]:
+    """Encode texts, running the model once per distinct text only.
+
+    Identical normalized texts within the batch share one encoding, and texts
+    whose hash ``lookup`` already knows reuse the stored vector. Hashes are
+    namespaced by vector_signature(encoder), and stored vectors that are
+    empty or of another dimension are encoded again.
+
+    Args:
+        encoder: Encoder used for texts not seen before
+        texts: Texts to encode
+        lookup: Returns stored vectors for the text_hash(text, signature)
+            hashes it knows
+
+    Returns:
+        Tuple of (vectors in input order, report) where the report counts
+        texts, duplicates within the batch, reused stored vectors, texts
+        actually encoded and the fraction of model work saved
+    """
+    signature = vector_signature(encoder)
+    hashes = [text_hash(text, signature) for text in texts]
+    first_text = {}
+    for digest, text in zip(hashes, texts):
+        first_text.setdefault(digest, text)
+
+    found = {}
+    if lookup is not None and first_text:
+        found = _valid_vectors(lookup(list(first_text)), _dimension(encoder))
+    reused = len(found)
+
+    missing = [digest for digest in first_text if digest not in found]
+    if missing:
+        vectors = encoder.encode_batch([first_text[digest] for digest in missing])
+        found.update(zip(missing, vectors))
+
+    report = {
+        'texts': len(texts),
+        'batch_duplicates': len(texts) - len(first_text),
+        'reused_stored': reused,
+        'encoded': len(missing),
+        'saved_fraction': 1 - len(missing) / len(texts) if texts else 0.0,
+    }
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32), report
+    return np.stack([found[digest] for digest in hashes]), report
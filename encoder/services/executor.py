@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from django.conf import settings
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the inference executor is at its admission limit."""
+
+
+class InferenceExecutor:
+    """Bounded thread pool that keeps model inference off the event loop.
+
+    At most ``max_workers`` tasks run at once and at most ``max_pending``
+    are admitted (running plus queued); beyond that submit() fails fast
+    with QueueFullError instead of letting the backlog grow.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        if max_workers <= 0 or max_pending <= 0:
+            raise ValueError("max_workers and max_pending must be positive")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='encoder-inference')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn(*args, **kwargs) on the pool.
+
+        Raises:
+            QueueFullError: If max_pending tasks are already admitted
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"{self._pending} encode requests already pending")
+            self._pending += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is held until the task finishes, even if the caller gave up.
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'max_workers': self.max_workers,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> InferenceExecutor:
+    """Process-wide executor sized from TRANSFORMER_SETTINGS['executor']."""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            config = settings.TRANSFORMER_SETTINGS.get('executor', {})
+            _executor = InferenceExecutor(
+                max_workers=config.get('max_workers', 2),
+                max_pending=config.get('max_pending', 32),
+            )
+    return _executor
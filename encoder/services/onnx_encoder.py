@@ -0,0 +1,203 @@
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+import numpy as np
+from django.conf import settings
+from .tokenized_encoder import TokenizedEncoder
+
+ONNX_FILENAME = 'model.onnx'
+# Hugging Face's model_max_length when a tokenizer has no configured limit
+UNLIMITED_LENGTH = int(1e30)
+
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            "The 'onnx' encoder backend needs onnxruntime: pip install onnxruntime"
+        ) from e
+    return onnxruntime
+
+
+def export_onnx(model_name: str, output_path: Optional[Union[str, Path]] = None) -> Path:
+    """Export a Hugging Face checkpoint from model_cache to ONNX.
+
+    The graph takes the tokenizer outputs with dynamic batch and sequence
+    axes and returns last_hidden_state; pooling is done by OnnxEncoder. The
+    tokenizer files are saved next to it so OnnxEncoder never imports
+    transformers (or torch). Run through ``manage.py export_onnx``.
+
+    Args:
+        model_name: Model configured in TRANSFORMER_SETTINGS
+        output_path: Target file; defaults to <cache_dir>/<model_name>/model.onnx
+
+    Returns:
+        Path: The written .onnx file
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    cache_dir = Path(settings.TRANSFORMER_SETTINGS['cache_dir'] + '/' + model_name)
+    output_path = Path(output_path) if output_path else cache_dir / ONNX_FILENAME
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+    model = AutoModel.from_pretrained(model_name, cache_dir=cache_dir).eval()
+    sample = tokenizer(["Export sample text.", "Another one."], padding=True, return_tensors="pt")
+    # ONNX names graph inputs positionally, so follow the forward() signature order.
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    export_kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        # Keep the TorchScript exporter, which handles dynamic_axes on all versions.
+        export_kwargs['dynamo'] = False
+
+    # Write to a temp file first so a failed export never leaves a truncated model.
+    tmp_path = output_path.with_suffix('.onnx.tmp')
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            str(tmp_path),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs
+        )
+    os.replace(tmp_path, output_path)
+    tokenizer.save_pretrained(output_path.parent)
+    return output_path
+
+
+class OnnxTokenizer:
+    """The part of the Hugging Face tokenizer API TokenizedEncoder uses, on tokenizers alone.
+
+    Loads the tokenizer.json and tokenizer_config.json written by export_onnx.
+    Importing transformers would import torch, which the ONNX backend avoids.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        from tokenizers import Tokenizer
+        directory = Path(directory)
+        self._tokenizer = Tokenizer.from_file(str(directory / 'tokenizer.json'))
+        self._tokenizer.no_truncation()
+        self._tokenizer.no_padding()
+        config = {}
+        config_path = directory / 'tokenizer_config.json'
+        if config_path.exists():
+            config = json.loads(config_path.read_text(encoding='utf-8'))
+        self.model_max_length = config.get('model_max_length') or UNLIMITED_LENGTH
+        pad_token = config.get('pad_token')
+        if isinstance(pad_token, dict):
+            pad_token = pad_token.get('content')
+        self.pad_token_id = (pad_token and self._tokenizer.token_to_id(pad_token)) or 0
+
+        # Special tokens the post-processor puts around a single sequence
+        probe = self._tokenizer.encode('a', add_special_tokens=False)
+        full = self._tokenizer.post_process(probe)
+        start = full.ids.index(probe.ids[0])
+        end = start + len(probe.ids)
+        self._prefix, self._suffix = full.ids[:start], full.ids[end:]
+        self._prefix_types, self._suffix_types = full.type_ids[:start], full.type_ids[end:]
+        self._type_id = full.type_ids[start]
+
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:  # pylint: disable=unused-argument
+        return len(self._prefix) + len(self._suffix)
+
+    def prepare_for_model(self, ids, add_special_tokens: bool = True, **kwargs) -> dict:  # pylint: disable=unused-argument
+        ids = list(ids)
+        type_ids = [self._type_id] * len(ids)
+        if add_special_tokens:
+            ids = self._prefix + ids + self._suffix
+            type_ids = self._prefix_types + type_ids + self._suffix_types
+        return {'input_ids': ids, 'token_type_ids': type_ids, 'attention_mask': [1] * len(ids)}
+
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False,
+                 add_special_tokens: bool = True, **kwargs):  # pylint: disable=unused-argument
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        limit = None
+        if truncation:
+            limit = self.model_max_length
+            if add_special_tokens:
+                limit -= self.num_special_tokens_to_add()
+        features = [self.prepare_for_model(encoding.ids[:limit], add_special_tokens)
+                    for encoding in self._tokenizer.encode_batch(texts, add_special_tokens=False)]
+        if padding or return_tensors:
+            return self.pad(features)
+        return {key: [feature[key] for feature in features]
+                for key in ('input_ids', 'token_type_ids', 'attention_mask')}
+
+    def pad(self, features, **kwargs) -> dict:  # pylint: disable=unused-argument
+        """Right-pad a list of features, or a dict of feature lists, into int64 arrays"""
+        if isinstance(features, dict):
+            features = [dict(zip(features, row)) for row in zip(*features.values())]
+        length = max(len(feature['input_ids']) for feature in features)
+        return {
+            key: np.array([list(feature[key]) + [value] * (length - len(feature[key]))
+                           for feature in features], dtype=np.int64)
+            for key, value in (('input_ids', self.pad_token_id), ('token_type_ids', 0), ('attention_mask', 0))
+        }
+
+
+class OnnxEncoder(TokenizedEncoder):
+    """Transformer encoder that runs an ONNX export through ONNX Runtime on CPU.
+
+    Shares tokenization, length bucketing and the encode_text/encode_batch
+    contract with TransformerEncoderBase through TokenizedEncoder; only the
+    forward pass differs. Neither torch nor transformers is imported.
+    """
+    backend = 'onnx'
+
+    def __init__(self, model_name: str = 'roberta-base', onnx_path: Optional[Union[str, Path]] = None):
+        """Initialize the encoder from an export made by ``manage.py export_onnx``.
+
+        Args:
+            model_name: Model configured in TRANSFORMER_SETTINGS
+            onnx_path: Exported model; defaults to the model's 'onnx_path'
+                setting or <cache_dir>/<model_name>/model.onnx
+
+        Raises:
+            FileNotFoundError: If the model has not been exported
+        """
+        onnxruntime = _require_onnxruntime()
+
+        self.EMPTY_INPUT_ERROR = "Input text cannot be empty or whitespace only"
+        self.model_name = model_name
+        config = settings.TRANSFORMER_SETTINGS['models'][model_name]
+        self.cache_dir = Path(settings.TRANSFORMER_SETTINGS['cache_dir'] + '/' + model_name)
+        self.device = 'cpu'
+        self.quantized = False
+
+        onnx_path = onnx_path or config.get('onnx_path') or self.cache_dir / ONNX_FILENAME
+        self.onnx_path = Path(onnx_path)
+        if not self.onnx_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX export of {model_name} at {self.onnx_path}; "
+                f"run 'python manage.py export_onnx {model_name}' first"
+            )
+
+        self.tokenizer = OnnxTokenizer(self.onnx_path.parent)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if config.get('intra_op_threads'):
+            options.intra_op_num_threads = config['intra_op_threads']
+        self.session = onnxruntime.InferenceSession(
+            str(self.onnx_path), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.model = None
+
+        self.configure(config)
+
+    def _forward(self, inputs) -> np.ndarray:
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in self.input_names}
+        hidden = self.session.run(['last_hidden_state'], feed)[0]
+        # Same masked mean as MeanPooling
+        mask = np.asarray(inputs['attention_mask'], dtype=np.float32)[..., None]
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
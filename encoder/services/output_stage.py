@@ -0,0 +1,123 @@
+import hashlib
+from pathlib import Path
+from typing import Optional, Union
+import numpy as np
+
+OUTPUT_DTYPES = ('float32', 'float16')
+
+
+def projection_path(cache_dir: Union[str, Path], output_dim: int) -> Path:
+    """Where the fitted PCA projection for a model and output size is stored."""
+    return Path(cache_dir) / f'projection_{output_dim}.npz'
+
+
+def fit_pca(vectors: np.ndarray, output_dim: int):
+    """Fit a PCA projection on a sample of full-size vectors.
+
+    Args:
+        vectors: Sample matrix, one row per vector
+        output_dim: Number of principal components to keep
+
+    Returns:
+        Tuple of (mean, components) with components of shape (output_dim, dim)
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    if output_dim <= 0 or output_dim > vectors.shape[1]:
+        raise ValueError(f"output_dim must be between 1 and {vectors.shape[1]}")
+    if len(vectors) < output_dim:
+        raise ValueError(f"Need at least {output_dim} sample vectors to fit {output_dim} components")
+    mean = vectors.mean(axis=0)
+    _, _, components = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean.astype(np.float32), components[:output_dim].astype(np.float32)
+
+
+class OutputStage:
+    """Final step of an encoder: optional PCA projection, then a cast.
+
+    Applied by the encoder itself, so index-time and query-time vectors
+    always go through the same projection.
+    """
+
+    def __init__(self,
+                 dtype: str = 'float32',
+                 mean: Optional[np.ndarray] = None,
+                 components: Optional[np.ndarray] = None):
+        if dtype not in OUTPUT_DTYPES:
+            raise ValueError(f"Unsupported output dtype: {dtype}")
+        if (mean is None) != (components is None):
+            raise ValueError("mean and components must be given together")
+        self.dtype = np.dtype(dtype)
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def from_config(cls, config: dict, cache_dir: Union[str, Path]) -> 'OutputStage':
+        """Build the stage from a model's TRANSFORMER_SETTINGS entry.
+
+        'output_dtype' selects float32 or float16; 'output_dim' loads the PCA
+        projection fitted for that size from the model's cache directory.
+
+        Raises:
+            FileNotFoundError: If output_dim is set but no projection was fitted
+        """
+        dtype = config.get('output_dtype', 'float32')
+        output_dim = config.get('output_dim')
+        if not output_dim:
+            return cls(dtype)
+        path = projection_path(cache_dir, output_dim)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"No projection to {output_dim} dimensions at {path}; run fit_projection first"
+            )
+        return cls.load(path, dtype)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], dtype: str = 'float32') -> 'OutputStage':
+        with np.load(path) as data:
+            return cls(dtype, data['mean'], data['components'])
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Persist the projection (the dtype lives in settings)."""
+        if self.components is None:
+            raise ValueError("Only a fitted projection can be saved")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, mean=self.mean, components=self.components)
+        return path
+
+    @property
+    def output_dim(self) -> Optional[int]:
+        return None if self.components is None else self.components.shape[0]
+
+    @property
+    def signature(self) -> str:
+        """Identifies the transformation, e.g. to namespace cached vectors."""
+        if self.components is None:
+            return self.dtype.name
+        digest = hashlib.sha256(self.components.tobytes()).hexdigest()[:12]
+        return f"{self.dtype.name}:pca{self.output_dim}:{digest}"
+
+    def __call__(self, vectors: np.ndarray) -> np.ndarray:
+        if self.components is not None:
+            vectors = (vectors - self.mean) @ self.components.T
+        return vectors.astype(self.dtype, copy=False)
+
+
+def fit_projection(encoder, texts, output_dim: int) -> OutputStage:
+    """Fit and save a PCA projection for a transformer encoder.
+
+    The sample texts (e.g. a random sample of Chunk.chunk_txt) are encoded
+    at full size; the projection is stored in the encoder's cache directory,
+    where OutputStage.from_config picks it up once 'output_dim' is set.
+    """
+    texts = list(texts)
+    full_size = OutputStage('float32')
+    current, encoder.output = encoder.output, full_size
+    try:
+        vectors = encoder.encode_batch(texts)
+    finally:
+        encoder.output = current
+    stage = OutputStage(current.dtype.name, *fit_pca(vectors, output_dim))
+    stage.save(projection_path(encoder.cache_dir, output_dim))
+    return stage
@@ -0,0 +1,92 @@
+import copy
+import io
+import time
+from typing import Dict, List, Optional
+import numpy as np
+import torch
+
+# Representative inputs for drift checks when the caller has no sample set.
+SAMPLE_TEXTS = [
+    "Keyword scoring ranks document chunks by similarity to a keyword.",
+    "The quarterly report shows revenue growth in all regions.",
+    "Patients were randomly assigned to the treatment or placebo group.",
+    "Install the dependencies and run the test suite before committing.",
+    "A short query.",
+    " ".join(["Long inputs exercise the full sequence length of the model."] * 20),
+]
+
+
+def quantize_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """Return a copy of model with its Linear layers dynamically quantized to int8.
+
+    Weights are stored as int8 and activations are quantized on the fly, so no
+    calibration data is needed. The result only runs on CPU.
+    """
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def model_size_bytes(model: torch.nn.Module) -> int:
+    """Serialized size of a model's state dict, which tracks its resident weights."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Per-row 1 - cosine similarity between two embedding matrices."""
+    reference = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12, None)
+    candidate = candidate / np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12, None)
+    return 1.0 - np.sum(reference * candidate, axis=1)
+
+
+def quantization_drift(encoder, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """Compare an fp32 transformer encoder with an int8-quantized copy of it.
+
+    Args:
+        encoder: fp32 TransformerEncoderBase (quantize disabled)
+        texts: Sample set to encode; defaults to SAMPLE_TEXTS
+
+    Returns:
+        Dict with mean/max cosine drift, encode seconds for both models,
+        the int8 speedup and both model sizes in bytes
+
+    Raises:
+        ValueError: If the encoder is already quantized
+    """
+    if getattr(encoder, 'quantized', False):
+        raise ValueError("Drift must be measured against an fp32 encoder")
+    texts = texts or SAMPLE_TEXTS
+
+    quantized = copy.copy(encoder)
+    quantized.device = torch.device('cpu')
+    quantized.model = quantize_dynamic(copy.deepcopy(encoder.model).to('cpu'))
+    quantized.quantized = True
+
+    start = time.perf_counter()
+    reference = encoder.encode_batch(texts)
+    fp32_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    candidate = quantized.encode_batch(texts)
+    int8_seconds = time.perf_counter() - start
+
+    drift = cosine_drift(reference, candidate)
+    return {
+        'mean_drift': float(drift.mean()),
+        'max_drift': float(drift.max()),
+        'fp32_seconds': fp32_seconds,
+        'int8_seconds': int8_seconds,
+        'speedup': fp32_seconds / int8_seconds if int8_seconds else 0.0,
+        'fp32_bytes': model_size_bytes(encoder.model),
+        'int8_bytes': model_size_bytes(quantized.model),
+    }
+
+
+def check_model_drift(model_name: str, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """Load model_name in fp32 and report quantization_drift for it."""
+    from .registry import registry
+    from .transformer_base import TransformerEncoderBase
+    model_name = registry.resolve(model_name)
+    factory = registry.factories.get(model_name, TransformerEncoderBase)
+    return quantization_drift(factory(model_name, quantize=False), texts)
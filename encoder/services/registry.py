@@ -0,0 +1,203 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
+from ..interfaces.base_encoder import BaseEncoder
+from .cache import CachedEncoder, EmbeddingCache
+
+# Short names accepted by the API in addition to the full model names.
+MODEL_ALIASES = {
+    'bert': 'bert-base-uncased',
+    'albert': 'albert-base-v2',
+    'roberta': 'roberta-base',
+}
+
+
+def _default_factories() -> Dict[str, Callable[[str], BaseEncoder]]:
+    from .transformer_base import BertEncoder, AlbertEncoder, RobertaEncoder
+    return {
+        'bert-base-uncased': BertEncoder,
+        'albert-base-v2': AlbertEncoder,
+        'roberta-base': RobertaEncoder,
+    }
+
+
+class EncoderRegistry:
+    """Process-wide, thread-safe cache of loaded encoders keyed by model name.
+
+    Each model is loaded at most once per process and kept resident until it
+    is evicted explicitly or has been idle for longer than ``idle_timeout``
+    seconds.
+    """
+
+    def __init__(self,
+                 factories: Optional[Dict[str, Callable[[str], BaseEncoder]]] = None,
+                 idle_timeout: Optional[float] = None):
+        """Initialize the registry.
+
+        Args:
+            factories: Mapping of model name to a callable building its encoder.
+                Defaults to the Bert/Albert/Roberta encoders.
+            idle_timeout: Seconds a model may go unused before evict_idle drops it.
+                None keeps models resident forever.
+        """
+        self._factories = factories
+        self.idle_timeout = idle_timeout
+        self._encoders: Dict[str, BaseEncoder] = {}
+        self._last_used: Dict[str, float] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._evict_listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def factories(self) -> Dict[str, Callable[[str], BaseEncoder]]:
+        # Resolved lazily so importing the registry does not import torch.
+        if self._factories is None:
+            self._factories = _default_factories()
+        return self._factories
+
+    def register(self, model_name: str, factory: Callable[[str], BaseEncoder]) -> None:
+        """Register (or replace) the factory used to build a model's encoder."""
+        with self._lock:
+            self.factories[model_name] = factory
+
+    def on_evict(self, listener: Callable[[str], None]) -> None:
+        """Call listener(model_name) after a model is dropped, so holders can release it."""
+        with self._lock:
+            self._evict_listeners.append(listener)
+
+    def _notify_evicted(self, model_names: List[str]) -> None:
+        with self._lock:
+            listeners = list(self._evict_listeners)
+        for model_name in model_names:
+            for listener in listeners:
+                listener(model_name)
+
+    def resolve(self, model_name: Optional[str] = None) -> str:
+        """Map an alias or None to a full model name.
+
+        Raises:
+            ValueError: If the model is neither registered nor configured
+        """
+        if not model_name:
+            model_name = settings.TRANSFORMER_SETTINGS['models']['default']
+        model_name = MODEL_ALIASES.get(model_name, model_name)
+        configured = settings.TRANSFORMER_SETTINGS['models'].get(model_name)
+        if model_name not in self.factories and not isinstance(configured, dict):
+            raise ValueError(f"Unsupported model: {model_name}.")
+        return model_name
+
+    def get(self, model_name: Optional[str] = None) -> BaseEncoder:
+        """Return the resident encoder for a model, loading it on first use.
+
+        Concurrent callers asking for the same model wait for a single load;
+        loads of different models do not block each other.
+        """
+        model_name = self.resolve(model_name)
+        if self.idle_timeout is not None:
+            self.evict_idle()
+
+        with self._lock:
+            encoder = self._encoders.get(model_name)
+            if encoder is not None:
+                self._last_used[model_name] = time.monotonic()
+                return encoder
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                encoder = self._encoders.get(model_name)
+            if encoder is None:
+                encoder = self._build(model_name)
+            with self._lock:
+                encoder = self._encoders.setdefault(model_name, encoder)
+                self._last_used[model_name] = time.monotonic()
+        return encoder
+
+    def _build(self, model_name: str) -> BaseEncoder:
+        config = settings.TRANSFORMER_SETTINGS['models'].get(model_name, {})
+        if config.get('backend') == 'onnx':
+            from .onnx_encoder import OnnxEncoder
+            factory = OnnxEncoder
+        else:
+            factory = self.factories.get(model_name)
+        if factory is None:
+            from .transformer_base import TransformerEncoderBase
+            factory = TransformerEncoderBase
+        encoder = factory(model_name)
+
+        cache = get_embedding_cache()
+        if cache is not None:
+            encoder = CachedEncoder(encoder, cache, model_name=model_name,
+                                    revision=config.get('revision', 'main'))
+        return encoder
+
+    def evict(self, model_name: str) -> bool:
+        """Drop a resident model. Returns True if it was loaded."""
+        model_name = MODEL_ALIASES.get(model_name, model_name)
+        with self._lock:
+            self._last_used.pop(model_name, None)
+            evicted = self._encoders.pop(model_name, None) is not None
+        if evicted:
+            self._notify_evicted([model_name])
+        return evicted
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop models unused for longer than idle_timeout.
+
+        Returns:
+            List of evicted model names
+        """
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [name for name, used in self._last_used.items()
+                    if now - used > self.idle_timeout]
+            for name in idle:
+                self._encoders.pop(name, None)
+                self._last_used.pop(name, None)
+        self._notify_evicted(idle)
+        return idle
+
+    def loaded(self) -> List[str]:
+        """Names of the models currently resident."""
+        with self._lock:
+            return list(self._encoders)
+
+    def clear(self) -> None:
+        """Drop all resident models."""
+        with self._lock:
+            evicted = list(self._encoders)
+            self._encoders.clear()
+            self._last_used.clear()
+        self._notify_evicted(evicted)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide embedding cache from TRANSFORMER_SETTINGS['cache'], or None if disabled."""
+    global _embedding_cache  # pylint: disable=global-statement
+    config = settings.TRANSFORMER_SETTINGS.get('cache', {})
+    if not config.get('enabled', False):
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                max_items=config.get('max_items', 10000),
+                path=config.get('path'),
+            )
+    return _embedding_cache
+
+
+registry = EncoderRegistry(
+    idle_timeout=settings.TRANSFORMER_SETTINGS.get('idle_timeout')
+)
+
+
+def get_encoder(model_name: Optional[str] = None) -> BaseEncoder:
+    """Shortcut for registry.get; None selects the configured default model."""
+    return registry.get(model_name)
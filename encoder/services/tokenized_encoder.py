@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+import numpy as np
+from ..interfaces.base_encoder import BaseEncoder
+from .output_stage import OutputStage
+
+class TokenizedEncoder(BaseEncoder):
+    """Tokenization, length bucketing, windows and pipelining shared by encoder backends.
+
+    Imports no deep learning framework, so backends that do not need torch
+    (ONNX Runtime) stay light. Subclasses set ``tokenizer`` (anything with the
+    Hugging Face tokenizer call, pad and prepare_for_model API) and implement
+    ``_forward``.
+    """
+    # Tensor type the tokenizer produces for _forward
+    return_tensors = "np"
+
+    def configure(self, config: dict):
+        """Apply the per-model TRANSFORMER_SETTINGS entry."""
+        self.dimension = config['dimension']
+        self.batch_size = config['batch_size']
+        # 'truncate' drops tokens past the model limit; 'window' encodes
+        # overlapping windows and pools them back per input.
+        self.long_text = config.get('long_text', 'truncate')
+        self.window_overlap = config.get('window_overlap', 64)
+        if self.long_text not in ('truncate', 'window'):
+            raise ValueError(f"Unsupported long_text mode: {self.long_text}")
+        # Overlap tokenization of the next batches with inference of the current one
+        self.pipeline = config.get('pipeline', False)
+        self.pipeline_depth = config.get('pipeline_depth', 2)
+        self.pipeline_stats = {}
+        # float16 and/or PCA-reduced output, applied to every returned vector
+        self.output = OutputStage.from_config(config, self.cache_dir)
+        if self.output.output_dim:
+            self.dimension = self.output.output_dim
+
+    def encode_text(self, text: str) -> np.ndarray:
+        """
+        Encode a single text string.
+        
+        Args:
+            text: Input text to encode
+            
+        Returns:
+            np.ndarray: Encoded text vector
+            
+        Raises:
+            ValueError: If input text is empty or whitespace only
+        """
+        if not text or not text.strip():
+            raise ValueError(self.EMPTY_INPUT_ERROR)
+        if self.long_text == 'window':
+            return self.output(self.encode_windows([text]))[0]
+
+        inputs = self.tokenizer(
+            text,
+            return_tensors=self.return_tensors,
+            padding=True,
+            truncation=True
+        )
+        return self.output(self._forward(inputs))[0]
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        """
+        Encode a list of texts in length-bucketed batches.
+
+        Texts are sorted by token length and run through the model
+        ``batch_size`` at a time, each bucket padded only to its own longest
+        member. Rows are returned in the order of ``texts``.
+
+        Args:
+            texts: Input texts to encode
+
+        Returns:
+            np.ndarray: Matrix with one encoded vector per text
+
+        Raises:
+            ValueError: If texts is empty
+        """
+        if not texts:
+            raise ValueError(self.EMPTY_INPUT_ERROR)
+        if self.long_text == 'window':
+            vectors = self.encode_windows(texts)
+        elif self.pipeline:
+            vectors = self.encode_pipelined(texts)
+        else:
+            encodings = self.tokenizer(list(texts), truncation=True)
+            features = [{key: encodings[key][i] for key in encodings.keys()}
+                        for i in range(len(texts))]
+            vectors = self._encode_features(features)
+        return self.output(vectors)
+
+    def encode_windows(self, texts: list[str]) -> np.ndarray:
+        """
+        Encode texts of any length with overlapping token windows.
+
+        Each text is split into windows of at most the model's maximum length
+        overlapping by ``window_overlap`` tokens. The windows of all texts are
+        encoded together in length-bucketed batches and pooled back into one
+        vector per text, weighted by each window's token count.
+
+        Args:
+            texts: Input texts to encode
+
+        Returns:
+            np.ndarray: Matrix with one encoded vector per text
+        """
+        if not texts:
+            raise ValueError(self.EMPTY_INPUT_ERROR)
+
+        max_length = self.tokenizer.model_max_length
+        if max_length > 100000:
+            # Tokenizers without a configured limit report a huge sentinel.
+            max_length = 512
+        window = max_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+        stride = max(window - self.window_overlap, 1)
+
+        token_ids = self.tokenizer(list(texts), add_special_tokens=False, truncation=False,
+                                   verbose=False)['input_ids']
+        features, owners, weights = [], [], []
+        for owner, ids in enumerate(token_ids):
+            starts = range(0, max(len(ids) - self.window_overlap, 1), stride)
+            for start in starts:
+                piece = ids[start:start + window]
+                features.append(self.tokenizer.prepare_for_model(
+                    piece, add_special_tokens=True, truncation=False, verbose=False
+                ))
+                owners.append(owner)
+                weights.append(max(len(piece), 1))
+
+        window_vectors = self._encode_features(features)
+        owners = np.asarray(owners)
+        weights = np.asarray(weights, dtype=window_vectors.dtype)
+        vectors = np.zeros((len(texts), window_vectors.shape[1]), dtype=window_vectors.dtype)
+        np.add.at(vectors, owners, window_vectors * weights[:, None])
+        vectors /= np.bincount(owners, weights=weights, minlength=len(texts))[:, None].astype(vectors.dtype)
+        return vectors
+
+    def encode_pipelined(self, texts: list[str], chunk_size: int = None) -> np.ndarray:
+        """
+        Encode texts with tokenization and inference running concurrently.
+
+        A producer thread tokenizes ``chunk_size`` texts at a time, length-buckets
+        them and queues padded batches (at most ``pipeline_depth`` ahead) while
+        the calling thread runs the model on the previous batch. Per-stage
+        timings of the last call are left in ``pipeline_stats``.
+
+        Args:
+            texts: Input texts to encode
+            chunk_size: Texts tokenized and bucketed together; defaults to
+                8 batches
+
+        Returns:
+            np.ndarray: Matrix with one encoded vector per text
+        """
+        if not texts:
+            raise ValueError(self.EMPTY_INPUT_ERROR)
+        texts = list(texts)
+        chunk_size = chunk_size or self.batch_size * 8
+        batches = queue.Queue(maxsize=max(self.pipeline_depth, 1))
+        stop = threading.Event()
+        done = object()
+        stats = {
+            'tokenize_seconds': 0.0,
+            'infer_seconds': 0.0,
+            # Producer blocked on a full queue: inference is the bottleneck
+            'tokenizer_blocked_seconds': 0.0,
+            # Model waiting on an empty queue: tokenization is the bottleneck
+            'model_idle_seconds': 0.0,
+            'batches': 0,
+        }
+
+        def put(item):
+            started = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            stats['tokenizer_blocked_seconds'] += time.perf_counter() - started
+
+        def produce():
+            try:
+                for offset in range(0, len(texts), chunk_size):
+                    started = time.perf_counter()
+                    encodings = self.tokenizer(texts[offset:offset + chunk_size], truncation=True)
+                    order = np.argsort([len(ids) for ids in encodings['input_ids']], kind='stable')
+                    stats['tokenize_seconds'] += time.perf_counter() - started
+                    for start in range(0, len(order), self.batch_size):
+                        if stop.is_set():
+                            return
+                        started = time.perf_counter()
+                        bucket = order[start:start + self.batch_size]
+                        inputs = self.tokenizer.pad(
+                            {key: [encodings[key][i] for i in bucket] for key in encodings.keys()},
+                            padding=True,
+                            return_tensors=self.return_tensors
+                        )
+                        stats['tokenize_seconds'] += time.perf_counter() - started
+                        put((bucket + offset, inputs))
+            except Exception as e:  # pylint: disable=broad-except
+                put(e)
+                return
+            put(done)
+
+        producer = threading.Thread(target=produce, name='encoder-tokenizer', daemon=True)
+        producer.start()
+        vectors = None
+        try:
+            while True:
+                started = time.perf_counter()
+                item = batches.get()
+                stats['model_idle_seconds'] += time.perf_counter() - started
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                rows, inputs = item
+                started = time.perf_counter()
+                pooled = self._forward(inputs)
+                stats['infer_seconds'] += time.perf_counter() - started
+                stats['batches'] += 1
+                if vectors is None:
+                    vectors = np.empty((len(texts), pooled.shape[1]), dtype=pooled.dtype)
+                vectors[rows] = pooled
+        finally:
+            stop.set()
+            producer.join()
+            self.pipeline_stats = stats
+        return vectors
+
+    def _encode_features(self, features: list[dict]) -> np.ndarray:
+        """Encode tokenized inputs in length-bucketed batches, keeping their order."""
+        lengths = [len(feature['input_ids']) for feature in features]
+        order = np.argsort(lengths, kind='stable')
+
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            inputs = self.tokenizer.pad(
+                [features[i] for i in bucket],
+                padding=True,
+                return_tensors=self.return_tensors
+            )
+            pooled = self._forward(inputs)
+            if vectors is None:
+                vectors = np.empty((len(features), pooled.shape[1]), dtype=pooled.dtype)
+            vectors[bucket] = pooled
+        return vectors
+
+    def _forward(self, inputs) -> np.ndarray:
+        """Run one padded batch through the model and return pooled vectors."""
+        raise NotImplementedError
+
+    def dimension(self) -> int:
+        return self._dimension
+    
+    # Provide an alias so that encode_text can be called as encode.
+    def encode(self, text: str):
+        return self.encode_text(text)
@@ -1,123 +1,99 @@
 from pathlib import Path
 import torch
 from transformers import AutoTokenizer, AutoModel, RobertaModel, BertModel, AlbertModel
-from ..interfaces.base_encoder import BaseEncoder
 from .pooling import MeanPooling
+from .quantization import quantize_dynamic
+from .tokenized_encoder import TokenizedEncoder
 import numpy as np
 from django.conf import settings
 
-class TransformerEncoderBase(BaseEncoder):
+class TransformerEncoderBase(TokenizedEncoder):
     """Encodes text using transformer models."""
-    def __init__(self, model_name: str = 'albert-base-v2'):
+    # Model class and extra from_pretrained kwargs; subclasses override these
+    # instead of loading a second copy of the weights after super().__init__.
+    model_class = AutoModel
+    model_kwargs = {}
+    return_tensors = "pt"
+    backend = 'torch'
+
+    def __init__(self, model_name: str = 'albert-base-v2', quantize: bool = None):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         """Initialize the transformer encoder."""
         # Error messages
         self.EMPTY_INPUT_ERROR = "Input text cannot be empty or whitespace only"
+        self.model_name = model_name
         config = settings.TRANSFORMER_SETTINGS['models'][model_name]
         cache_dir = settings.TRANSFORMER_SETTINGS['cache_dir']
         self.cache_dir = Path(cache_dir+'/'+ model_name)
+        # Opt-in int8 dynamic quantization, per model in TRANSFORMER_SETTINGS
+        self.quantized = config.get('quantize', False) if quantize is None else quantize
+        if self.quantized:
+            # Quantized linear kernels only exist for CPU
+            self.device = torch.device('cpu')
 
 
         self.tokenizer = AutoTokenizer.from_pretrained(
             model_name,
             cache_dir=self.cache_dir
         )
-        self.model = AutoModel.from_pretrained(
+        self.model = self.model_class.from_pretrained(
             model_name,
-            cache_dir=self.cache_dir
-        ).to(self.device)
+            cache_dir=self.cache_dir,
+            **self.model_kwargs
+        )
+        self.init_model()
+        self.model.to(self.device)
+        if self.quantized:
+            self.model = quantize_dynamic(self.model)
 
         self.pooling = MeanPooling()
-        self.dimension = config['dimension']
-        self.batch_size = config['batch_size']
-
-    def encode_text(self, text: str) -> np.ndarray:
-        """
-        Encode a single text string.
-        
-        Args:
-            text: Input text to encode
-            
-        Returns:
-            np.ndarray: Encoded text vector
-            
-        Raises:
-            ValueError: If input text is empty or whitespace only
-        """
-        if not text or not text.strip():
-            raise ValueError(self.EMPTY_INPUT_ERROR)
-
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True
-        ).to(self.device)
+        self.configure(config)
 
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        return outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
-
-    def encode_batch(self, texts: list[str]) -> np.ndarray:
-        if not texts:
-            raise ValueError(self.EMPTY_INPUT_ERROR)
-        inputs = self.tokenizer(
-            texts,
-            return_tensors="pt",
-            padding=True,
-            truncation=True
-        ).to(self.device)
-        #inputs = {k: v.to(self.device) for k, v in inputs.items()}
+    def init_model(self):
+        """Hook for subclasses to adjust the freshly loaded model."""
 
+    def _forward(self, inputs) -> np.ndarray:
+        """Run tokenized inputs through the model and mean-pool real tokens."""
+        inputs = inputs.to(self.device)
         with torch.no_grad():
             outputs = self.model(**inputs)
-        return outputs.last_hidden_state.mean(dim=1).cpu().numpy()
-
-    def dimension(self) -> int:
-        return self._dimension
-    
-    # Provide an alias so that encode_text can be called as encode.
-    def encode(self, text: str):
-        return self.encode_text(text)
+        # Padding positions are masked out so bucketed and single-text
+        # encodings of the same input agree.
+        return self.pooling(outputs, inputs['attention_mask']).cpu().numpy()
 
 class BertEncoder(TransformerEncoderBase):
-    def __init__(self, model_name: str = 'bert-base-uncased'):
-        super().__init__(model_name)
-        self.model = BertModel.from_pretrained(
-            model_name,
-            output_hidden_states=True,
-            cache_dir=self.cache_dir
-        )
+    model_class = BertModel
+    model_kwargs = {'output_hidden_states': True}
+
+    def __init__(self, model_name: str = 'bert-base-uncased', quantize: bool = None):
+        super().__init__(model_name, quantize)
+
+    def init_model(self):
         if hasattr(self.model, 'pooler'):
             self.model.pooler.dense.weight.data.normal_(mean=0.0, std=0.02)
             self.model.pooler.dense.bias.data.zero_()
-        self.model.to(self.device)
 
 class AlbertEncoder(TransformerEncoderBase):
-    def __init__(self, model_name: str = 'albert-base-v2'):
-        super().__init__(model_name)
-        self.model = AlbertModel.from_pretrained(
-            model_name,
-            output_hidden_states=True,
-            cache_dir=self.cache_dir
-        )
+    model_class = AlbertModel
+    model_kwargs = {'output_hidden_states': True}
+
+    def __init__(self, model_name: str = 'albert-base-v2', quantize: bool = None):
+        super().__init__(model_name, quantize)
+
+    def init_model(self):
         # Albert uses a simple Linear layer as pooler
         if hasattr(self.model, 'pooler'):
             self.model.pooler.weight.data.normal_(mean=0.0, std=0.02)
             self.model.pooler.bias.data.zero_()
-        self.model.to(self.device)
 
 class RobertaEncoder(TransformerEncoderBase):
-    def __init__(self, model_name: str = 'roberta-base'):
-        super().__init__(model_name)
-        self.model = RobertaModel.from_pretrained(
-            model_name,
-            output_hidden_states=True,
-            cache_dir=self.cache_dir
-        )
-        # Move model to correct device without custom initialization
-        self.model.to(self.device)
+    model_class = RobertaModel
+    model_kwargs = {'output_hidden_states': True}
+
+    def __init__(self, model_name: str = 'roberta-base', quantize: bool = None):
+        super().__init__(model_name, quantize)
 
-        # Validate model loaded correctly
+    def init_model(self):
+        # Validate model loaded correctly; no custom initialization
         if not hasattr(self.model, 'pooler'):
-            raise ValueError(f"Model {model_name} does not have expected pooler layer")
+            raise ValueError(f"Model {self.model_name} does not have expected pooler layer")
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from django.conf import settings
+from .cache import CachedEncoder
+from .registry import registry as default_registry
+
+logger = logging.getLogger(__name__)
+
+# Approximate token counts warmed up when none are configured
+DEFAULT_WARMUP_LENGTHS = [16, 128, 512]
+
+
+def warmup(encoder, lengths: Optional[List[int]] = None, batch_size: Optional[int] = None) -> float:
+    """Run throwaway batches at representative sequence lengths.
+
+    This triggers lazy kernel initialization and allocator growth before
+    real traffic arrives. An embedding cache wrapper is bypassed and every
+    row is a distinct text, so each batch really runs through the model.
+
+    Returns:
+        float: Seconds spent warming up
+    """
+    if isinstance(encoder, CachedEncoder):
+        encoder = encoder.encoder
+    lengths = lengths or DEFAULT_WARMUP_LENGTHS
+    batch_size = batch_size or getattr(encoder, 'batch_size', None) or 8
+    start = time.perf_counter()
+    for length in lengths:
+        encoder.encode_batch([" ".join(["warmup"] * (length - 1) + [str(row)])
+                              for row in range(batch_size)])
+    return time.perf_counter() - start
+
+
+class Readiness:
+    """Thread-safe record of which preloaded models are ready to serve."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict] = {}
+
+    def expect(self, model_names: List[str]) -> None:
+        with self._lock:
+            for name in model_names:
+                self._models[name] = {'state': 'loading'}
+
+    def update(self, model_name: str, **fields) -> None:
+        with self._lock:
+            self._models.setdefault(model_name, {}).update(fields)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(model['state'] == 'ready' for model in self._models.values())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'ready': all(model['state'] == 'ready' for model in self._models.values()),
+                'models': {name: dict(model) for name, model in self._models.items()},
+            }
+
+
+readiness = Readiness()
+
+
+def preload_models(model_names: Optional[List[str]] = None,
+                   lengths: Optional[List[int]] = None,
+                   registry=None,
+                   state: Optional[Readiness] = None) -> Dict:
+    """Load and warm up models, recording cold-start timings in readiness.
+
+    Args:
+        model_names: Models to preload; defaults to TRANSFORMER_SETTINGS['preload']['models']
+        lengths: Warmup sequence lengths; defaults to the preload setting
+        registry: Encoder registry to load into; defaults to the shared one
+        state: Readiness record to update; defaults to the shared one
+
+    Returns:
+        Dict: Readiness snapshot after preloading
+    """
+    config = settings.TRANSFORMER_SETTINGS.get('preload', {})
+    registry = registry or default_registry
+    state = state or readiness
+    if model_names is None:
+        model_names = config.get('models') or [settings.TRANSFORMER_SETTINGS['models']['default']]
+    lengths = lengths or config.get('warmup_lengths')
+
+    state.expect(model_names)
+    for model_name in model_names:
+        try:
+            start = time.perf_counter()
+            encoder = registry.get(model_name)
+            load_seconds = time.perf_counter() - start
+            state.update(model_name, state='warming', load_seconds=load_seconds)
+            warmup_seconds = warmup(encoder, lengths)
+            state.update(model_name, state='ready', warmup_seconds=warmup_seconds)
+            logger.info("Preloaded %s: load %.2fs, warmup %.2fs", model_name, load_seconds, warmup_seconds)
+        except Exception as e:  # pylint: disable=broad-except
+            state.update(model_name, state='failed', error=str(e))
+            logger.exception("Preloading %s failed", model_name)
+    return state.snapshot()
+
+
+def start_preload(background: bool = True) -> Optional[threading.Thread]:
+    """Preload the configured models, in a daemon thread unless background is False."""
+    if not background:
+        preload_models()
+        return None
+    # Mark models as loading right away so the readiness probe fails until done.
+    config = settings.TRANSFORMER_SETTINGS.get('preload', {})
+    readiness.expect(config.get('models') or [settings.TRANSFORMER_SETTINGS['models']['default']])
+    thread = threading.Thread(target=preload_models, name='encoder-preload', daemon=True)
+    thread.start()
+    return thread
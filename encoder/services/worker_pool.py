@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import queue
+import threading
+from typing import List, Optional
+import numpy as np
+from ..interfaces.base_encoder import BaseEncoder
+
+# Seconds between worker liveness checks while waiting for results
+POLL_SECONDS = 0.5
+
+
+def _worker_main(encoder: BaseEncoder, threads: int, tasks, results) -> None:
+    """Worker loop: encode blocks from tasks until a None sentinel arrives."""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        block_index, texts = task
+        try:
+            results.put((block_index, encoder.encode_batch(texts), None))
+        except Exception as e:  # pylint: disable=broad-except
+            results.put((block_index, None, f"{type(e).__name__}: {e}"))
+
+
+class EncoderPool(BaseEncoder):
+    """Runs one encoder in several forked worker processes.
+
+    The encoder is built once in the parent; workers are forked from it so
+    the model weights are shared copy-on-write instead of loaded per worker.
+    encode_batch splits its input into blocks, hands them to the workers
+    round-robin and reassembles the rows in input order.
+
+    Create the pool before running any inference in the parent process:
+    forking after the OpenMP thread pool has started can hang the workers.
+    """
+
+    def __init__(self,
+                 encoder: BaseEncoder,
+                 num_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 block_size: Optional[int] = None):
+        """Fork the workers.
+
+        Args:
+            encoder: Loaded encoder to share with the workers
+            num_workers: Worker processes; defaults to the CPU count
+            threads_per_worker: Intra-op threads pinned in each worker;
+                defaults to an even split of the CPUs
+            block_size: Texts per block sent to a worker; defaults to the
+                encoder's batch_size
+        """
+        cpus = os.cpu_count() or 1
+        self.num_workers = num_workers or cpus
+        if self.num_workers <= 0:
+            raise ValueError("num_workers must be positive")
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.num_workers)
+        self.block_size = block_size or getattr(encoder, 'batch_size', None) or 32
+        self.encoder = encoder
+        self.batch_size = self.block_size
+        self.model_name = getattr(encoder, 'model_name', None)
+        dimension = getattr(encoder, 'dimension', None)
+        self.dimension = dimension() if callable(dimension) else dimension
+
+        # Fork (not spawn) so workers inherit the already loaded weights.
+        context = multiprocessing.get_context('fork')
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(self.num_workers)]
+        self._workers = [
+            context.Process(
+                target=_worker_main,
+                args=(encoder, self.threads_per_worker, tasks, self._results),
+                name=f'encoder-worker-{i}',
+                daemon=True,
+            )
+            for i, tasks in enumerate(self._tasks)
+        ]
+        for worker in self._workers:
+            worker.start()
+        # One batch at a time: results come back on a single shared queue.
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def encode_text(self, text: str) -> np.ndarray:
+        if not text or not text.strip():
+            raise ValueError("Input text cannot be empty or whitespace only")
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode texts across the workers; rows are returned in input order.
+
+        Raises:
+            ValueError: If texts is empty
+            RuntimeError: If a worker failed or died, or the pool is closed.
+                A dead worker (killed, OOM, segfault) closes the pool.
+        """
+        if not texts:
+            raise ValueError("Input text cannot be empty or whitespace only")
+        if self._closed:
+            raise RuntimeError("EncoderPool is closed")
+
+        blocks = [texts[i:i + self.block_size] for i in range(0, len(texts), self.block_size)]
+        with self._lock:
+            for block_index, block in enumerate(blocks):
+                self._tasks[block_index % self.num_workers].put((block_index, block))
+            gathered = [None] * len(blocks)
+            errors = []
+            for _ in blocks:
+                block_index, vectors, error = self._next_result()
+                if error is not None:
+                    errors.append(error)
+                gathered[block_index] = vectors
+        if errors:
+            raise RuntimeError(f"Encoder worker failed: {errors[0]}")
+        return np.concatenate(gathered)
+
+    def _next_result(self):
+        """Wait for a worker result, failing instead of hanging if a worker died."""
+        while True:
+            try:
+                return self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                pass
+            dead = [worker for worker in self._workers if not worker.is_alive()]
+            if dead:
+                # Its blocks will never come back, so the pool cannot be reused
+                self.close(timeout=POLL_SECONDS)
+                raise RuntimeError(
+                    f"Encoder worker {dead[0].name} died (exit code {dead[0].exitcode}); pool closed"
+                )
+
+    def dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, text: str):
+        return self.encode_text(text)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,82 @@
+import threading
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from django.urls import reverse
+from ..services.executor import InferenceExecutor, QueueFullError
+from .test_base_encoder import MockEncoder
+
+class BlockingEncoder(MockEncoder):
+    """Encoder whose encode_batch waits until released."""
+    def __init__(self):
+        self.release = threading.Event()
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        self.release.wait(5)
+        return np.ones((len(texts), 5))
+
+class InferenceExecutorTest(SimpleTestCase):
+    def test_admission_limit(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=2)
+        release = threading.Event()
+        futures = [executor.submit(release.wait, 5) for _ in range(2)]
+        with self.assertRaises(QueueFullError):
+            executor.submit(release.wait, 5)
+        release.set()
+        for future in futures:
+            future.result()
+        executor.submit(lambda: None).result()
+        stats = executor.stats()
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['completed'], 3)
+        executor.shutdown()
+
+class AsyncEncodingViewTests(SimpleTestCase):
+    def setUp(self):
+        self.url = reverse('api-encode-async')
+        self.encoder = MockEncoder()
+        self.executor = InferenceExecutor(max_workers=1, max_pending=1)
+        for target, value in (('encoder.views.get_executor', self.executor),
+                              ('encoder.views.get_encoder', self.encoder)):
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=False)
+
+    async def test_single_text(self):
+        response = await self.async_client.post(self.url, {"text": "Test text"}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["encoded"]), 5)
+
+    async def test_batch(self):
+        response = await self.async_client.post(self.url, {"texts": ["a", "b"]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(np.array(response.json()["encoded"]).shape, (2, 5))
+
+    async def test_missing_text(self):
+        response = await self.async_client.post(self.url, {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_queue_full(self):
+        blocking = BlockingEncoder()
+        self.executor.submit(blocking.encode_batch, ["busy"])
+        response = await self.async_client.post(self.url, {"text": "Test"}, content_type='application/json')
+        blocking.release.set()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    async def test_timeout(self):
+        blocking = BlockingEncoder()
+        with mock.patch('encoder.views.get_encoder', return_value=blocking):
+            response = await self.async_client.post(
+                self.url, {"text": "Test", "timeout": 0.05}, content_type='application/json')
+        blocking.release.set()
+        self.assertEqual(response.status_code, 503)
+
+    async def test_unsupported_model(self):
+        with mock.patch('encoder.views.get_encoder', side_effect=ValueError("Unsupported model: x.")):
+            response = await self.async_client.post(
+                self.url, {"text": "Test", "model": "x"}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
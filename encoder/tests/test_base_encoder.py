@@ -7,7 +7,7 @@ class MockEncoder(BaseEncoder):
         return np.zeros(5)
 
     def encode_batch(self, texts: list[str]) -> np.ndarray:
-        return np.zeros((len(texts), 5))
+        return np.array([[len(text)] * 5 for text in texts], dtype=np.float32)
 
     def dimension(self) -> int:
         return 5
@@ -30,3 +30,30 @@ class BaseEncoderTest(TestCase):
         dim = self.encoder.dimension()
         self.assertIsInstance(dim, int)
         self.assertEqual(dim, 5)
+
+    def test_encode_iter_yields_blocks(self):
+        texts = (f"text {i}" for i in range(7))
+        blocks = list(self.encoder.encode_iter(texts, batch_size=3))
+        self.assertEqual([len(ids) for ids, _ in blocks], [3, 3, 1])
+        self.assertEqual(blocks[-1][0], [6])
+        self.assertEqual(blocks[0][1].shape, (3, 5))
+
+    def test_encode_iter_with_ids(self):
+        pairs = [(10, "a"), (11, "bb"), (12, "ccc")]
+        blocks = list(self.encoder.encode_iter(iter(pairs), batch_size=2))
+        self.assertEqual(blocks[0][0], [10, 11])
+        self.assertEqual(blocks[1][0], [12])
+        np.testing.assert_array_equal(blocks[1][1][0], [3] * 5)
+
+    def test_encode_iter_is_lazy(self):
+        consumed = []
+        def texts():
+            for i in range(100):
+                consumed.append(i)
+                yield "text"
+        iterator = self.encoder.encode_iter(texts(), batch_size=10)
+        next(iterator)
+        self.assertEqual(len(consumed), 10)
+
+    def test_encode_iter_empty(self):
+        self.assertEqual(list(self.encoder.encode_iter([], batch_size=4)), [])
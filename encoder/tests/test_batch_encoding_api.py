@@ -0,0 +1,65 @@
+import io
+from unittest import mock
+import msgpack
+import numpy as np
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from .test_base_encoder import MockEncoder
+
+class LengthEncoder(MockEncoder):
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        return np.array([[len(text), 1.5] for text in texts], dtype=np.float32)
+
+class BatchEncodingAPIViewTests(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('api-encode-batch')
+        self.texts = ["one", "three", "fifteen chars.."]
+        self.expected = np.array([[3, 1.5], [5, 1.5], [15, 1.5]], dtype=np.float32)
+        patcher = mock.patch('encoder.views.get_encoder', return_value=LengthEncoder())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, data, **kwargs):
+        return self.client.post(self.url, data, format='json', **kwargs)
+
+    def test_npy_is_default(self):
+        response = self.post({"texts": self.texts})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-npy')
+        np.testing.assert_array_equal(np.load(io.BytesIO(response.content)), self.expected)
+
+    def test_raw_octet_stream(self):
+        response = self.post({"texts": self.texts}, HTTP_ACCEPT='application/octet-stream')
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['X-Embedding-Shape'], '3,2')
+        matrix = np.frombuffer(response.content, dtype=response['X-Embedding-Dtype']).reshape(3, 2)
+        np.testing.assert_array_equal(matrix, self.expected)
+
+    def test_msgpack(self):
+        response = self.post({"texts": self.texts}, HTTP_ACCEPT='application/msgpack')
+        payload = msgpack.unpackb(response.content)
+        matrix = np.frombuffer(payload['data'], dtype=payload['dtype']).reshape(payload['shape'])
+        np.testing.assert_array_equal(matrix, self.expected)
+
+    def test_json_opt_in(self):
+        response = self.client.post(self.url + '?format=json', {"texts": self.texts}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        np.testing.assert_array_equal(np.array(response.json()["encoded"]), self.expected)
+
+    def test_missing_texts(self):
+        response = self.post({})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn("error", response.json())
+
+    def test_empty_text_rejected(self):
+        response = self.post({"texts": ["ok", " "]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unsupported_model(self):
+        with mock.patch('encoder.views.get_encoder', side_effect=ValueError):
+            response = self.post({"texts": self.texts, "model": "unsupported"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unsupported model", response.json()["error"])
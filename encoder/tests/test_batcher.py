@@ -0,0 +1,138 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import numpy as np
+from django.test import Client, TestCase
+from django.urls import reverse
+from ..interfaces.base_encoder import BaseEncoder
+from ..services.batcher import MicroBatcher, _batchers, get_batcher
+from ..services.registry import registry
+
+class RecordingEncoder(BaseEncoder):
+    """Encodes a text as [len(text)] * 3 and records the batch sizes it saw."""
+    def __init__(self):
+        self.batches = []
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        self.batches.append(len(texts))
+        time.sleep(0.01)
+        return np.array([[len(t)] * 3 for t in texts], dtype=np.float32)
+
+    def dimension(self) -> int:
+        return 3
+
+class MicroBatcherTest(TestCase):
+    def setUp(self):
+        self.encoder = RecordingEncoder()
+        self.batcher = MicroBatcher(self.encoder, max_batch_size=8, max_wait_ms=50)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def test_single_encode(self):
+        vector = self.batcher.encode("abc")
+        np.testing.assert_array_equal(vector, [3, 3, 3])
+
+    def test_concurrent_calls_are_coalesced(self):
+        texts = ["x" * (i + 1) for i in range(16)]
+        results = {}
+
+        def call(text):
+            results[text] = self.batcher.encode(text)
+
+        threads = [threading.Thread(target=call, args=(t,)) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for text in texts:
+            np.testing.assert_array_equal(results[text], [len(text)] * 3)
+        self.assertLess(len(self.encoder.batches), len(texts))
+        self.assertTrue(all(size <= 8 for size in self.encoder.batches))
+        stats = self.batcher.stats()
+        self.assertEqual(stats['items'], len(texts))
+        self.assertGreater(stats['fill_rate'], 0)
+        self.assertLessEqual(stats['fill_rate'], 1)
+
+    def test_empty_input(self):
+        with self.assertRaises(ValueError):
+            self.batcher.encode(" ")
+
+    def test_encoder_errors_reach_callers(self):
+        def fail(texts):
+            raise RuntimeError("boom")
+        self.encoder.encode_batch = fail
+        with self.assertRaises(RuntimeError):
+            self.batcher.encode("abc")
+
+    def test_closed_batcher_rejects(self):
+        self.batcher.close()
+        with self.assertRaises(RuntimeError):
+            self.batcher.encode("abc")
+
+    def test_timeout_cancels_queued_text(self):
+        release = threading.Event()
+        encode_batch = self.encoder.encode_batch
+
+        def slow(texts):
+            release.wait(timeout=5)
+            return encode_batch(texts)
+        self.encoder.encode_batch = slow
+        first = self.batcher.submit("first")
+        time.sleep(0.1)  # "first" is now running, so "late" stays queued
+        with self.assertRaises(FutureTimeoutError):
+            self.batcher.encode("late", timeout=0.05)
+        release.set()
+        first.result(timeout=5)
+        self.batcher.close(timeout=5)
+        self.assertEqual(self.encoder.batches, [1])
+
+class SharedBatcherTest(TestCase):
+    def test_api_requests_share_model_batches(self):
+        encoder = RecordingEncoder()
+        registry.register('recording-test', lambda name: encoder)
+        self.addCleanup(registry.evict, 'recording-test')
+        self.addCleanup(lambda: _batchers.pop('recording-test').close())
+        texts = ["x" * (i + 1) for i in range(8)]
+        responses = {}
+
+        def call(text):
+            responses[text] = Client().post(reverse('api-encode'), {'text': text, 'model': 'recording-test'},
+                                            content_type='application/json')
+
+        threads = [threading.Thread(target=call, args=(t,)) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for text in texts:
+            self.assertEqual(responses[text].status_code, 200)
+            self.assertEqual(responses[text].json()['encoded'], [len(text)] * 3)
+        self.assertLess(len(encoder.batches), len(texts))
+        self.assertEqual(get_batcher('recording-test').stats()['items'], len(texts))
+
+    def test_eviction_releases_the_batcher_encoder(self):
+        built = []
+
+        def factory(name):
+            built.append(RecordingEncoder())
+            return built[-1]
+
+        registry.register('evicted-test', factory)
+        self.addCleanup(registry.evict, 'evicted-test')
+        batcher = get_batcher('evicted-test')
+        self.assertIs(get_batcher('evicted-test'), batcher)
+
+        registry.evict('evicted-test')
+        self.assertNotIn('evicted-test', _batchers)
+        with self.assertRaises(RuntimeError):
+            batcher.submit("closed")
+
+        fresh = get_batcher('evicted-test')
+        self.assertIsNot(fresh, batcher)
+        self.assertIs(fresh.encoder, registry.get('evicted-test'))
+        self.assertEqual(len(built), 2)
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import numpy as np
+from django.test import TestCase
+from ..interfaces.base_encoder import BaseEncoder
+from ..services.cache import CachedEncoder, EmbeddingCache
+
+class CountingEncoder(BaseEncoder):
+    def __init__(self):
+        self.encoded = []
+        self.model_name = 'counting'
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        self.encoded.extend(texts)
+        return np.array([[len(t), t.count('a'), 1.0] for t in texts], dtype=np.float32)
+
+    def dimension(self) -> int:
+        return 3
+
+class EmbeddingCacheTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.cache = EmbeddingCache(max_items=2, path=self.path)
+        self.inner = CountingEncoder()
+        self.encoder = CachedEncoder(self.inner, self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_repeat_text_served_from_cache(self):
+        first = self.encoder.encode_text("banana")
+        second = self.encoder.encode_text("  banana ")
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(self.inner.encoded, ["banana"])
+        self.assertEqual(self.cache.stats()['memory_hits'], 1)
+
+    def test_batch_encodes_only_misses(self):
+        self.encoder.encode_text("apple")
+        result = self.encoder.encode_batch(["apple", "kiwi", "kiwi", "apple"])
+        self.assertEqual(self.inner.encoded, ["apple", "kiwi"])
+        np.testing.assert_array_equal(result[1], result[2])
+        np.testing.assert_array_equal(result[0], [5, 1, 1])
+
+    def test_disk_tier_survives_restart(self):
+        self.encoder.encode_batch(["one", "two", "three"])
+        self.cache.close()
+        cache = EmbeddingCache(max_items=2, path=self.path)
+        inner = CountingEncoder()
+        result = CachedEncoder(inner, cache).encode_batch(["one", "two", "three"])
+        self.assertEqual(inner.encoded, [])
+        self.assertEqual(cache.stats()['disk_hits'], 3)
+        self.assertEqual(result.shape, (3, 3))
+        cache.close()
+
+    def test_lru_is_bounded(self):
+        self.encoder.encode_batch(["a", "b", "c"])
+        self.assertEqual(self.cache.stats()['memory_items'], 2)
+
+    def test_key_depends_on_model_and_revision(self):
+        keys = {
+            EmbeddingCache.make_key('m1', 'main', 'text'),
+            EmbeddingCache.make_key('m2', 'main', 'text'),
+            EmbeddingCache.make_key('m1', 'v2', 'text'),
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_key_depends_on_quantization_and_backend(self):
+        self.encoder.encode_text("banana")
+        int8 = CountingEncoder()
+        int8.quantized = True
+        onnx = CountingEncoder()
+        onnx.backend = 'onnx'
+        for inner in (int8, onnx):
+            CachedEncoder(inner, self.cache).encode_text("banana")
+            self.assertEqual(inner.encoded, ["banana"])
+        self.assertEqual(CachedEncoder(int8, self.cache).revision, 'main|int8')
+
+    def test_key_depends_on_long_text_mode(self):
+        self.encoder.encode_text("banana")
+        windowed = CountingEncoder()
+        windowed.long_text, windowed.window_overlap = 'window', 64
+        CachedEncoder(windowed, self.cache).encode_text("banana")
+        self.assertEqual(windowed.encoded, ["banana"])
+        self.assertEqual(CachedEncoder(windowed, self.cache).revision, 'main|window64')
+
+    def test_empty_input_not_cached(self):
+        with self.assertRaises(ValueError):
+            CachedEncoder(TinyValidatingEncoder(), self.cache).encode_text(" ")
+
+class TinyValidatingEncoder(CountingEncoder):
+    def encode_text(self, text: str) -> np.ndarray:
+        if not text.strip():
+            raise ValueError("empty")
+        return super().encode_text(text)
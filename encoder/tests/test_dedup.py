@@ -0,0 +1,51 @@
+import numpy as np
+from django.test import SimpleTestCase
+from ..services.dedup import encode_deduplicated, text_hash, vector_signature
+from .test_batcher import RecordingEncoder
+
+class EncodeDeduplicatedTest(SimpleTestCase):
+    def setUp(self):
+        self.encoder = RecordingEncoder()
+
+    def test_batch_duplicates_encoded_once(self):
+        texts = ["boilerplate", "unique text", "boilerplate ", "boilerplate"]
+        vectors, report = encode_deduplicated(self.encoder, texts)
+        self.assertEqual(self.encoder.batches, [2])
+        self.assertEqual(vectors.shape, (4, 3))
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+        self.assertEqual(report['batch_duplicates'], 2)
+        self.assertEqual(report['encoded'], 2)
+        self.assertAlmostEqual(report['saved_fraction'], 0.5)
+
+    def test_stored_vectors_reused(self):
+        stored = {text_hash("already stored", vector_signature(self.encoder)): [9.0, 9.0, 9.0]}
+        lookup = lambda hashes: {h: stored[h] for h in hashes if h in stored}
+        vectors, report = encode_deduplicated(self.encoder, ["already stored", "new"], lookup)
+        np.testing.assert_array_equal(vectors[0], [9, 9, 9])
+        np.testing.assert_array_equal(vectors[1], [3, 3, 3])
+        self.assertEqual(report['reused_stored'], 1)
+        self.assertEqual(report['encoded'], 1)
+
+    def test_all_stored_skips_model(self):
+        lookup = lambda hashes: {h: [1.0, 2.0, 3.0] for h in hashes}
+        _, report = encode_deduplicated(self.encoder, ["a", "b"], lookup)
+        self.assertEqual(self.encoder.batches, [])
+        self.assertEqual(report['saved_fraction'], 1.0)
+
+    def test_invalid_stored_vectors_reencoded(self):
+        # Empty JSON and vectors from a model of another dimension
+        lookup = lambda hashes: dict(zip(hashes, [{}, [1.0, 2.0]]))
+        vectors, report = encode_deduplicated(self.encoder, ["empty", "short"], lookup)
+        self.assertEqual(report['reused_stored'], 0)
+        self.assertEqual(self.encoder.batches, [2])
+        np.testing.assert_array_equal(vectors, [[5, 5, 5], [5, 5, 5]])
+
+    def test_hash_namespaced_by_signature(self):
+        self.assertEqual(vector_signature(self.encoder), "|RecordingEncoder")
+        self.assertNotEqual(text_hash("text", vector_signature(self.encoder)),
+                            text_hash("text", "roberta-base|RobertaEncoder|float32"))
+        self.assertEqual(text_hash(" text "), text_hash("text"))
+
+    def test_signature_includes_long_text_mode(self):
+        self.encoder.long_text, self.encoder.window_overlap = 'window', 32
+        self.assertEqual(vector_signature(self.encoder), "|RecordingEncoder|window32")
@@ -26,19 +26,20 @@ class EncodingAPIViewTests(APITestCase):
 
     def _patch_encode_method(self, encoder_cls, return_value):
         """
-        Patch the encode method on the encoder class to return a fixed value.
+        Patch encode_batch (which the request batcher calls) on the encoder
+        class to return a fixed value per text.
         Returns the original method so it can be restored after test.
         """
-        original_encode = encoder_cls.encode
+        original_encode = encoder_cls.encode_batch
 
-        def fake_encode(self, text):
-            return return_value
+        def fake_encode_batch(self, texts):
+            return np.stack([return_value] * len(texts))
 
-        encoder_cls.encode = fake_encode
+        encoder_cls.encode_batch = fake_encode_batch
         return original_encode
 
     def _restore_encode_method(self, encoder_cls, original_encode):
-        encoder_cls.encode = original_encode
+        encoder_cls.encode_batch = original_encode
 
     def test_bert_encoder_success(self):
         expected_output = np.array([0.1, 0.2, 0.3])
@@ -72,17 +73,17 @@ class EncodingAPIViewTests(APITestCase):
         self._restore_encode_method(RobertaEncoder, original_encode)
 
     def test_encoding_exception(self):
-        # Patch BertEncoder to raise an exception when encode is called.
-        original_encode = BertEncoder.encode
+        # Patch BertEncoder to raise an exception when encode_batch is called.
+        original_encode = BertEncoder.encode_batch
 
-        def fake_encode_error(self, text):
+        def fake_encode_error(self, texts):
             raise Exception("Encoding error")
 
-        BertEncoder.encode = fake_encode_error
+        BertEncoder.encode_batch = fake_encode_error
         data = {"text": "Test text", "model": "bert"}
         response = self.client.post(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
         self.assertIn("error", response.data)
         self.assertEqual(response.data["error"], "Encoding error")
-        # Restore original encode method
-        BertEncoder.encode = original_encode
+        # Restore original encode_batch method
+        BertEncoder.encode_batch = original_encode
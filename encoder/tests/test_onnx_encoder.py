@@ -0,0 +1,76 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from ..services.transformer_base import TransformerEncoderBase
+
+HAS_ONNXRUNTIME = importlib.util.find_spec('onnxruntime') is not None
+
+IMPORT_SCRIPT = """
+import json, sys
+import django
+django.setup()
+import encoder.services.onnx_encoder
+print(json.dumps([name for name in ('torch', 'transformers') if name in sys.modules]))
+"""
+
+class OnnxImportTest(SimpleTestCase):
+    def test_import_skips_torch_and_transformers(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'scorekeywords.settings'))
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=settings.BASE_DIR,
+                                env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+
+@unittest.skipUnless(HAS_ONNXRUNTIME, "onnxruntime is not installed")
+class OnnxEncoderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from ..services.onnx_encoder import OnnxEncoder, export_onnx
+        cls.model_name = 'roberta-base'
+        cls.reference = TransformerEncoderBase(cls.model_name)
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.onnx_path = export_onnx(cls.model_name, os.path.join(cls.tmpdir.name, 'model.onnx'))
+        cls.encoder = OnnxEncoder(cls.model_name, cls.onnx_path)
+        cls.texts = ["First test sentence.", "A second, somewhat longer test sentence."]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def test_missing_export_is_not_built_on_demand(self):
+        from ..services.onnx_encoder import OnnxEncoder
+        with self.assertRaises(FileNotFoundError):
+            OnnxEncoder(self.model_name, os.path.join(self.tmpdir.name, 'missing.onnx'))
+
+    def test_encode_text(self):
+        vector = self.encoder.encode_text(self.texts[0])
+        self.assertIsInstance(vector, np.ndarray)
+        self.assertEqual(len(vector), self.encoder.dimension)
+
+    def test_tokenizer_matches_transformers(self):
+        texts = self.texts + ["word " * 600]
+        ours = self.encoder.tokenizer(texts, truncation=True)
+        theirs = self.reference.tokenizer(texts, truncation=True)
+        self.assertEqual(ours['input_ids'], theirs['input_ids'])
+
+    def test_matches_torch_encoder(self):
+        np.testing.assert_allclose(
+            self.encoder.encode_batch(self.texts),
+            self.reference.encode_batch(self.texts),
+            atol=1e-3
+        )
+
+    def test_empty_input(self):
+        with self.assertRaises(ValueError):
+            self.encoder.encode_text(" ")
+        with self.assertRaises(ValueError):
+            self.encoder.encode_batch([])
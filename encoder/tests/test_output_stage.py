@@ -0,0 +1,50 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from ..services.output_stage import OutputStage, fit_pca, projection_path
+
+class OutputStageTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # 64-d vectors that mostly live in an 8-d subspace
+        basis = rng.normal(size=(8, 64))
+        self.vectors = (rng.normal(size=(200, 8)) @ basis + 0.01 * rng.normal(size=(200, 64))).astype(np.float32)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_default_is_identity(self):
+        stage = OutputStage()
+        np.testing.assert_array_equal(stage(self.vectors), self.vectors)
+        self.assertIsNone(stage.output_dim)
+
+    def test_float16(self):
+        out = OutputStage('float16')(self.vectors)
+        self.assertEqual(out.dtype, np.float16)
+        np.testing.assert_allclose(out, self.vectors, rtol=1e-2, atol=1e-2)
+
+    def test_pca_projection_preserves_distances(self):
+        stage = OutputStage('float32', *fit_pca(self.vectors, 8))
+        projected = stage(self.vectors)
+        self.assertEqual(projected.shape, (200, 8))
+        full = np.linalg.norm(self.vectors[0] - self.vectors[1:], axis=1)
+        reduced = np.linalg.norm(projected[0] - projected[1:], axis=1)
+        np.testing.assert_allclose(reduced, full, rtol=0.05)
+
+    def test_save_and_load_from_config(self):
+        stage = OutputStage('float32', *fit_pca(self.vectors, 8))
+        stage.save(projection_path(self.tmpdir.name, 8))
+        loaded = OutputStage.from_config({'output_dim': 8, 'output_dtype': 'float16'}, self.tmpdir.name)
+        self.assertEqual(loaded.output_dim, 8)
+        np.testing.assert_allclose(loaded(self.vectors), stage(self.vectors), rtol=1e-2, atol=1e-2)
+        self.assertNotEqual(loaded.signature, OutputStage('float16').signature)
+
+    def test_missing_projection(self):
+        with self.assertRaises(FileNotFoundError):
+            OutputStage.from_config({'output_dim': 8}, os.path.join(self.tmpdir.name, 'none'))
+
+    def test_invalid_dimension(self):
+        with self.assertRaises(ValueError):
+            fit_pca(self.vectors, 65)
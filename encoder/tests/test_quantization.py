@@ -0,0 +1,31 @@
+import numpy as np
+import torch
+from django.test import TestCase
+from ..services.quantization import cosine_drift, model_size_bytes, quantize_dynamic
+
+class QuantizationTest(TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = torch.nn.Sequential(
+            torch.nn.Linear(64, 256),
+            torch.nn.ReLU(),
+            torch.nn.Linear(256, 64),
+        ).eval()
+
+    def test_quantized_linear_layers_are_smaller(self):
+        quantized = quantize_dynamic(self.model)
+        self.assertLess(model_size_bytes(quantized), model_size_bytes(self.model))
+        # The original fp32 model is left untouched
+        self.assertIsInstance(self.model[0], torch.nn.Linear)
+
+    def test_quantized_output_stays_close(self):
+        quantized = quantize_dynamic(self.model)
+        inputs = torch.randn(8, 64)
+        with torch.no_grad():
+            drift = cosine_drift(self.model(inputs).numpy(), quantized(inputs).numpy())
+        self.assertLess(drift.max(), 0.01)
+
+    def test_cosine_drift(self):
+        a = np.array([[1.0, 0.0], [0.0, 2.0]])
+        b = np.array([[2.0, 0.0], [1.0, 0.0]])
+        np.testing.assert_allclose(cosine_drift(a, b), [0.0, 1.0], atol=1e-7)
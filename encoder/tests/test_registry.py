@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+from django.test import TestCase
+from ..interfaces.base_encoder import BaseEncoder
+from ..services.registry import EncoderRegistry
+
+class CountingEncoder(BaseEncoder):
+    loads = 0
+
+    def __init__(self, model_name: str):
+        CountingEncoder.loads += 1
+        self.model_name = model_name
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return np.zeros(5)
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        return np.zeros((len(texts), 5))
+
+    def dimension(self) -> int:
+        return 5
+
+class EncoderRegistryTest(TestCase):
+    def setUp(self):
+        CountingEncoder.loads = 0
+        self.registry = EncoderRegistry(factories={
+            'bert-base-uncased': CountingEncoder,
+            'roberta-base': CountingEncoder,
+        })
+
+    def test_loads_once(self):
+        first = self.registry.get('bert-base-uncased')
+        second = self.registry.get('bert-base-uncased')
+        self.assertIs(first, second)
+        self.assertEqual(CountingEncoder.loads, 1)
+
+    def test_alias_resolves_to_model_name(self):
+        encoder = self.registry.get('bert')
+        self.assertIs(encoder, self.registry.get('bert-base-uncased'))
+        self.assertEqual(encoder.model_name, 'bert-base-uncased')
+
+    def test_default_model(self):
+        self.assertEqual(self.registry.get().model_name, 'roberta-base')
+
+    def test_unsupported_model(self):
+        with self.assertRaises(ValueError):
+            self.registry.get('unsupported')
+
+    def test_concurrent_get_loads_once(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.registry.get('bert')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(CountingEncoder.loads, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_evict(self):
+        self.registry.get('bert')
+        self.assertTrue(self.registry.evict('bert'))
+        self.assertEqual(self.registry.loaded(), [])
+        self.registry.get('bert')
+        self.assertEqual(CountingEncoder.loads, 2)
+
+    def test_evict_idle(self):
+        self.registry.idle_timeout = 10
+        self.registry.get('bert')
+        self.assertEqual(self.registry.evict_idle(now=0), [])
+        evicted = self.registry.evict_idle(now=float('inf'))
+        self.assertEqual(evicted, ['bert-base-uncased'])
+        self.assertEqual(self.registry.loaded(), [])
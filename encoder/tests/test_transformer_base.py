@@ -1,3 +1,4 @@
+import copy
 import os
 import shutil
 import torch
@@ -91,3 +92,32 @@ class TestTransformerBase(TestCase):
         # Test bias initialization
         bias_sum = self.encoder.model.pooler.dense.bias.data.sum().item()
         self.assertEqual(bias_sum, 0)
+
+    def test_bucketed_batch_matches_single(self):
+        texts = ["Short.", " ".join(["word"] * 60), "A medium length test sentence."] * 7
+        embeddings = self.encoder.encode_batch(texts)
+        singles = np.stack([self.encoder.encode_text(text) for text in texts])
+        self.assertEqual(embeddings.shape, (len(texts), self.dimension))
+        np.testing.assert_allclose(embeddings, singles, atol=1e-4)
+
+    def test_sliding_window_long_text(self):
+        window_encoder = copy.copy(self.encoder)
+        window_encoder.long_text = 'window'
+        long_text = " ".join(f"word{i}" for i in range(2000))
+        short_text = "A short test sentence."
+
+        embeddings = window_encoder.encode_batch([long_text, short_text])
+        self.assertEqual(embeddings.shape, (2, self.dimension))
+        # Short inputs fit in one window and match the truncating path
+        np.testing.assert_allclose(embeddings[1], self.encoder.encode_text(short_text), atol=1e-4)
+        # Long inputs use the text past the model limit
+        self.assertFalse(np.allclose(embeddings[0], self.encoder.encode_text(long_text), atol=1e-4))
+
+    def test_pipelined_batch_matches_sequential(self):
+        texts = [" ".join(["word"] * (i % 40 + 1)) for i in range(50)]
+        pipelined = self.encoder.encode_pipelined(texts, chunk_size=self.batch_size * 2)
+        np.testing.assert_allclose(pipelined, self.encoder.encode_batch(texts), atol=1e-4)
+        stats = self.encoder.pipeline_stats
+        self.assertEqual(stats['batches'], -(-len(texts) // self.batch_size))
+        self.assertGreater(stats['infer_seconds'], 0)
+        self.assertGreater(stats['tokenize_seconds'], 0)
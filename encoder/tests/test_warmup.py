@@ -0,0 +1,65 @@
+import numpy as np
+from django.test import SimpleTestCase
+from django.urls import reverse
+from ..services.cache import CachedEncoder, EmbeddingCache
+from ..services.registry import EncoderRegistry
+from ..services.warmup import Readiness, preload_models, readiness, warmup
+from .test_base_encoder import MockEncoder
+
+class RecordingEncoder(MockEncoder):
+    batch_size = 2
+
+    def __init__(self, model_name=None):
+        self.batches = []
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        self.batches.append(texts)
+        return np.zeros((len(texts), 5))
+
+class FailingEncoder(MockEncoder):
+    def __init__(self, model_name=None):
+        raise OSError("download failed")
+
+class WarmupTest(SimpleTestCase):
+    def test_warmup_runs_each_length(self):
+        encoder = RecordingEncoder()
+        seconds = warmup(encoder, lengths=[4, 32])
+        self.assertEqual(len(encoder.batches), 2)
+        self.assertEqual(len(encoder.batches[1]), 2)
+        self.assertEqual(len(encoder.batches[1][0].split()), 32)
+        self.assertEqual(len(set(encoder.batches[1])), 2)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_warmup_bypasses_embedding_cache(self):
+        encoder = RecordingEncoder()
+        cached = CachedEncoder(encoder, EmbeddingCache(), model_name='recording')
+        warmup(cached, lengths=[4])
+        warmup(cached, lengths=[4])
+        self.assertEqual([len(batch) for batch in encoder.batches], [2, 2])
+
+    def test_preload_records_timings(self):
+        registry = EncoderRegistry(factories={'bert-base-uncased': RecordingEncoder})
+        state = Readiness()
+        snapshot = preload_models(['bert'], lengths=[4], registry=registry, state=state)
+        self.assertTrue(snapshot['ready'])
+        self.assertIn('load_seconds', snapshot['models']['bert'])
+        self.assertIn('warmup_seconds', snapshot['models']['bert'])
+        self.assertEqual(registry.loaded(), ['bert-base-uncased'])
+
+    def test_failed_preload_is_not_ready(self):
+        registry = EncoderRegistry(factories={'bert-base-uncased': FailingEncoder})
+        state = Readiness()
+        snapshot = preload_models(['bert'], registry=registry, state=state)
+        self.assertFalse(snapshot['ready'])
+        self.assertEqual(snapshot['models']['bert']['state'], 'failed')
+
+    def test_readiness_endpoint(self):
+        url = reverse('api-ready')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        readiness.expect(['pending-model'])
+        try:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()['models']['pending-model']['state'], 'loading')
+        finally:
+            readiness.update('pending-model', state='ready')
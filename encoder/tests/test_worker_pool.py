@@ -0,0 +1,68 @@
+import os
+import signal
+import numpy as np
+from django.test import SimpleTestCase
+from ..interfaces.base_encoder import BaseEncoder
+from ..services.worker_pool import EncoderPool
+
+class PidEncoder(BaseEncoder):
+    """Encodes a text as [len(text), pid of the encoding process]."""
+    batch_size = 4
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        if "fail" in texts:
+            raise ValueError("bad text")
+        return np.array([[len(t), os.getpid()] for t in texts], dtype=np.float64)
+
+    def dimension(self) -> int:
+        return 2
+
+class EncoderPoolTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pool = EncoderPool(PidEncoder(), num_workers=2, threads_per_worker=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        super().tearDownClass()
+
+    def test_results_in_input_order(self):
+        texts = ["x" * (i + 1) for i in range(21)]
+        vectors = self.pool.encode_batch(texts)
+        self.assertEqual(vectors.shape, (21, 2))
+        np.testing.assert_array_equal(vectors[:, 0], np.arange(1, 22))
+
+    def test_blocks_spread_over_workers(self):
+        vectors = self.pool.encode_batch(["text"] * 16)
+        pids = set(vectors[:, 1].astype(int))
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_encode_text(self):
+        np.testing.assert_array_equal(self.pool.encode_text("abc")[0], 3)
+
+    def test_worker_error(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.encode_batch(["ok", "fail"])
+        # The pool keeps working after a failed batch
+        self.assertEqual(self.pool.encode_batch(["ok"]).shape, (1, 2))
+
+    def test_empty_input(self):
+        with self.assertRaises(ValueError):
+            self.pool.encode_batch([])
+
+class DeadWorkerTest(SimpleTestCase):
+    def test_killed_worker_raises_instead_of_hanging(self):
+        pool = EncoderPool(PidEncoder(), num_workers=2, threads_per_worker=1)
+        self.addCleanup(pool.close)
+        os.kill(pool._workers[0].pid, signal.SIGKILL)
+        pool._workers[0].join(5)
+        with self.assertRaisesRegex(RuntimeError, "died"):
+            pool.encode_batch(["text"] * 8)
+        with self.assertRaises(RuntimeError):
+            pool.encode_batch(["text"])
@@ -1,7 +1,19 @@
+import asyncio
+import json
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from encoder.services.transformer_base import BertEncoder, AlbertEncoder, RobertaEncoder
+from encoder.services.batcher import get_batcher
+from encoder.services.registry import get_encoder
+from encoder.services.executor import get_executor, QueueFullError
+from encoder.services.warmup import readiness
+from encoder.renderers import NpyRenderer, OctetStreamRenderer, MsgpackRenderer, EmbeddingJSONRenderer
 
 # Create your views here.
 
@@ -10,7 +22,8 @@ class EncodingAPIView(APIView):
     An API view to encode text using a selected transformer encoder.
     Request JSON should include:
       - text: The text to encode.
-      - model: (Optional) One of 'bert', 'albert', or 'roberta' (default: 'bert').
+      - model: (Optional) One of 'bert', 'albert', 'roberta' or a configured
+               model name (default: 'bert').
     """
     def post(self, request, format=None):
         text = request.data.get('text')
@@ -22,22 +35,23 @@ class EncodingAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Selecting the correct encoder based on model choice.
-        if model_choice == 'bert':
-            encoder = BertEncoder()
-        elif model_choice == 'albert':
-            encoder = AlbertEncoder()
-        elif model_choice == 'roberta':
-            encoder = RobertaEncoder()
-        else:
+        # Encoders are loaded once per process; concurrent requests for the
+        # same model share one encode_batch call through its batcher.
+        try:
+            batcher = get_batcher(model_choice)
+        except ValueError:
             return Response(
                 {"error": f"Unsupported model: {model_choice}."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         try:
-            # Assuming the encoder has an encode() method.
-            encoded_output = encoder.encode(text)
+            encoded_output = batcher.encode(text)
+        except FutureTimeoutError:
+            return Response(
+                {"error": "Encoding timed out."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -48,3 +62,127 @@ class EncodingAPIView(APIView):
             {"encoded": encoded_output},
             status=status.HTTP_200_OK
         )
+
+
+class BatchEncodingAPIView(APIView):
+    """
+    An API view to encode many texts in one round trip.
+    Request JSON should include:
+      - texts: List of texts to encode.
+      - model: (Optional) Same choices as EncodingAPIView (default: 'bert').
+    The matrix is returned as .npy by default; pick another format with the
+    Accept header or ?format=: 'raw' (application/octet-stream, shape and
+    dtype in X-Embedding-Shape/X-Embedding-Dtype), 'msgpack' or 'json'.
+    """
+    renderer_classes = [NpyRenderer, OctetStreamRenderer, MsgpackRenderer, EmbeddingJSONRenderer]
+    max_texts = 4096
+
+    def post(self, request, format=None):
+        texts = request.data.get('texts')
+        model_choice = request.data.get('model', 'bert').lower()
+
+        if not isinstance(texts, list) or not texts:
+            return Response(
+                {"error": "No texts provided."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(texts) > self.max_texts:
+            return Response(
+                {"error": f"At most {self.max_texts} texts per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            return Response(
+                {"error": "Texts must be non-empty strings."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            encoder = get_encoder(model_choice)
+        except ValueError:
+            return Response(
+                {"error": f"Unsupported model: {model_choice}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            encoded = encoder.encode_batch(texts)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response(encoded, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncEncodingView(View):
+    """
+    An async API view that encodes on a bounded inference executor so
+    CPU-bound model work never blocks the ASGI event loop.
+    Request JSON should include:
+      - text: A text to encode, or
+      - texts: A list of texts to encode.
+      - model: (Optional) Same choices as EncodingAPIView (default: 'bert').
+      - timeout: (Optional) Seconds to wait, capped at the configured timeout.
+    Responds 429 when the executor queue is full and 503 on timeout.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON."}, status=status.HTTP_400_BAD_REQUEST)
+
+        text = data.get('text')
+        texts = data.get('texts')
+        model_choice = str(data.get('model', 'bert')).lower()
+        if texts is None:
+            texts = [text] if text else None
+        if not isinstance(texts, list) or not texts or \
+                not all(isinstance(t, str) and t.strip() for t in texts):
+            return JsonResponse({"error": "No text provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        config = settings.TRANSFORMER_SETTINGS.get('executor', {})
+        timeout = config.get('timeout', 10.0)
+        try:
+            timeout = min(float(data.get('timeout', timeout)), timeout)
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "Invalid timeout."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            future = get_executor().submit(_encode_texts, model_choice, texts)
+        except QueueFullError as e:
+            response = JsonResponse({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = '1'
+            return response
+
+        try:
+            encoded = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            return JsonResponse({"error": "Encoding timed out."},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if text is not None and data.get('texts') is None:
+            encoded = encoded[0]
+        return JsonResponse({"encoded": encoded.tolist()}, status=status.HTTP_200_OK)
+
+
+def _encode_texts(model_choice, texts):
+    # Runs on the executor; the first call for a model also loads it there.
+    return get_encoder(model_choice).encode_batch(texts)
+
+
+def readiness_view(request):
+    """Readiness probe: 200 once preloaded models are warm, 503 before that."""
+    snapshot = readiness.snapshot()
+    return JsonResponse(
+        snapshot,
+        status=status.HTTP_200_OK if snapshot['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
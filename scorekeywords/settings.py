@@ -11,7 +11,6 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
 from pathlib import Path
-import torch
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -176,20 +175,118 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Transformer Model Settings
 TRANSFORMER_SETTINGS = {
     'cache_dir': os.path.join(BASE_DIR, 'model_cache'),
-    'db_dimension': 768,
+    # Vector index dimension; None follows the default encoder (including output_dim)
+    'db_dimension': None,
+    # Seconds an unused model stays resident in the encoder registry (None = forever)
+    'idle_timeout': None,
+    # Content-addressed embedding cache wrapped around registry encoders
+    'cache': {
+        'enabled': False,
+        'max_items': 10000,
+        'path': os.path.join(BASE_DIR, 'embedding_cache.sqlite3'),
+    },
+    # Request coalescing in front of encode_batch (encoder.services.batcher)
+    'batcher': {
+        'max_batch_size': 32,
+        'max_wait_ms': 5,
+        'timeout': 30.0,  # seconds a single-text request waits for its vector
+    },
+    # Load and warm up models at startup; /api/ready/ returns 503 until done
+    'preload': {
+        'enabled': os.getenv('ENCODER_PRELOAD', 'False').lower() == 'true',
+        'background': True,
+        'models': ['roberta-base'],
+        'warmup_lengths': [16, 128, 512],
+    },
+    # Bounded inference pool behind the async encoding endpoint
+    'executor': {
+        'max_workers': 2,
+        'max_pending': 32,  # admitted requests beyond this get 429
+        'timeout': 10.0,  # seconds before a request gets 503
+    },
     "models": {
         'default': 'roberta-base',
         'bert-base-uncased': {
             'dimension': 768,
             'batch_size': 16,
+            'quantize': False,  # int8 dynamic quantization for CPU inference
+            'backend': 'torch',  # 'onnx' runs an ONNX Runtime export (manage.py export_onnx)
+            # 'window' encodes inputs past the model limit as overlapping windows
+            'long_text': 'truncate',
+            'window_overlap': 64,
+            # Tokenize the next batches on a thread while the model runs
+            'pipeline': False,
+            'pipeline_depth': 2,
+            # 'float16' halves vector size; output_dim projects through a PCA
+            # fitted with output_stage.fit_projection (the index follows it unless
+            # db_dimension is set)
+            'output_dtype': 'float32',
+            'output_dim': None,
         },
         'albert-base-v2': {
             'dimension': 768,
             'batch_size': 16,
+            'quantize': False,
+            'backend': 'torch',
+            'long_text': 'truncate',
+            'window_overlap': 64,
+            'pipeline': False,
+            'pipeline_depth': 2,
+            'output_dtype': 'float32',
+            'output_dim': None,
         },
         'roberta-base': {
             'dimension': 768,
             'batch_size': 16,
+            'quantize': False,
+            'backend': 'torch',
+            'long_text': 'truncate',
+            'window_overlap': 64,
+            'pipeline': False,
+            'pipeline_depth': 2,
+            'output_dtype': 'float32',
+            'output_dim': None,
         }
     }
 }
+
+# Vector index settings (vector_db.faiss_db)
+VECTOR_DB_SETTINGS = {
+    'index_path': os.environ.get('VECTOR_DB_INDEX_PATH', 'faiss_index'),
+    # Memory-map the saved index so worker processes share its pages through
+    # the OS page cache; a mapped index is read-only
+    'mmap': os.environ.get('VECTOR_DB_MMAP', '').lower() in ('1', 'true', 'yes'),
+    'index': {
+        # 'flat' is exact; 'ivf_flat' and 'hnsw' are approximate and much
+        # faster on large corpora (compare with vector_db.benchmark)
+        'index_type': 'flat',
+        'nlist': 100,
+        'hnsw_m': 32,
+        'ef_construction': 40,
+        # 'ivf_pq' stores pq_m * pq_nbits / 8 bytes per vector: 96 bytes
+        # instead of 3 KB for 768-d float32 (32x smaller). keep_vectors writes
+        # the originals to disk to re-rank the top candidates exactly.
+        'pq_m': 96,
+        'pq_nbits': 8,
+        'opq': False,
+        'keep_vectors': False,
+        'rerank_factor': 4,
+    },
+    # Ingest writes small fsynced delta segments instead of rewriting the
+    # whole index; max_deltas deltas trigger a background merge into the base
+    'segments': {
+        'enabled': True,
+        'max_deltas': 8,
+    },
+    # vector_db.shards.ShardedVectorDB: one index directory per corpus, split
+    # into sub-shards of at most max_shard_vectors; loaded shards beyond
+    # memory_budget_mb are unloaded least recently used first. IVF shards
+    # stay flat until they hold train_size vectors (None: 39 per centroid)
+    'shards': {
+        'root': os.environ.get('VECTOR_DB_SHARDS_ROOT', 'faiss_shards'),
+        'max_shard_vectors': 1_000_000,
+        'train_size': None,
+        'memory_budget_mb': 4096,
+        'max_workers': 4,
+    },
+}
@@ -16,11 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from encoder.views import EncodingAPIView
+from encoder.views import EncodingAPIView, BatchEncodingAPIView, AsyncEncodingView, readiness_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('ui/', include('ui.urls')),
 
     path('api/encode/', EncodingAPIView.as_view(),name='api-encode'),  # Include the encoder app's URLs
+    path('api/encode/batch/', BatchEncodingAPIView.as_view(), name='api-encode-batch'),
+    path('api/encode/async/', AsyncEncodingView.as_view(), name='api-encode-async'),
+    path('api/ready/', readiness_view, name='api-ready'),
 ]
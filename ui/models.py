@@ -1,6 +1,7 @@
 '''This file contains the models for usage in the ui app'''
 from django.db import models
 from django.contrib.auth.models import User
+from encoder.services.dedup import text_hash
 
 class BaseModel(models.Model):
     '''Base model with common fields'''
@@ -41,6 +42,17 @@ class Chunk(BaseModel):
     end_index = models.IntegerField(default=-1)
     vector = models.JSONField()
     chunk_size = models.IntegerField(default = 128)
+    # What produced vector (encoder.services.dedup.vector_signature); '' if unknown
+    vector_signature = models.CharField(max_length=255, blank=True, default='')
+    # sha256 of vector_signature and the normalized chunk text; lets identical
+    # chunks encoded the same way reuse a vector. Only save() sets it, so rows
+    # written by bulk_create()/update() or before signatures existed are never
+    # reused; re-save them with vector_signature set to make them eligible.
+    text_hash = models.CharField(max_length=64, db_index=True, blank=True, default='')
+
+    def save(self, *args, **kwargs):
+        self.text_hash = text_hash(self.chunk_txt, self.vector_signature)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Chunk {self.seq} of Document {self.document.name}"
@@ -95,3 +95,18 @@ class ModelTests(TestCase):
         self.assertEqual(self.score.keyword, self.keyword)
         self.assertEqual(self.score.value, 0.95)
         self.assertEqual(self.score.created_by, self.user)
+
+    def test_chunk_text_hash(self):
+        '''Test chunk text hash ignores whitespace differences'''
+        self.assertEqual(len(self.chunk.text_hash), 64)
+        other = Chunk.objects.create(
+            document=self.document,
+            seq=2,
+            chunk_txt="  This is a   test chunk. ",
+            vector={},
+            created_by=self.user
+        )
+        self.assertEqual(other.text_hash, self.chunk.text_hash)
+        other.vector_signature = 'roberta-base|RobertaEncoder|float32'
+        other.save()
+        self.assertNotEqual(other.text_hash, self.chunk.text_hash)
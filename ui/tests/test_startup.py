@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Seconds allowed for a cold django.setup() plus URLconf import
+STARTUP_BUDGET = 5.0
+# Modules that must only be imported on first use, never at startup
+HEAVY_MODULES = ['torch', 'transformers', 'faiss', 'pandas', 'onnxruntime']
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+"""
+
+class StartupTimeTest(SimpleTestCase):
+    """Cold start of a fresh interpreter, as paid by every manage.py command and worker"""
+
+    def run_startup(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'scorekeywords.settings'))
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT % (HEAVY_MODULES,)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_no_heavy_imports_at_startup(self):
+        self.assertEqual(self.run_startup()['loaded'], [])
+
+    def test_startup_within_budget(self):
+        self.assertLess(self.run_startup()['seconds'], STARTUP_BUDGET)
@@ -12,12 +12,8 @@ from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from ui.models import Corpus, Document, Chunk, Keyword
 from ui.forms.all_forms import CorpusForm, DocumentForm, ChunkForm, KeywordForm
 from ui.serializers import CorpusSerializer, DocumentSerializer, ChunkSerializer
-
-
-import pandas as pd
-import sqlite3
-import faiss
-import os
+from encoder.services.registry import get_encoder
+from encoder.services.dedup import encode_deduplicated, vector_signature
 
 def home(request):
     '''Renders the home page'''
@@ -56,8 +52,8 @@ class ProcessDocumentView(View):
                 num_chunks=0,
                 created_by=request.user
             )
-            self.chunk_and_encode(document)
-            return JsonResponse({'status': 'success'}, status=201)
+            report = self.chunk_and_encode(document)
+            return JsonResponse({'status': 'success', 'dedup': report}, status=201)
         except (Document.DoesNotExist, ValueError, KeyError) as e:
             return JsonResponse({'error': str(e)}, status=400)
         #pylint: enable=unused-argument
@@ -67,17 +63,25 @@ class ProcessDocumentView(View):
         words = content.split()
         chunk_size = 400
         overlap = 100
-        chunks = []
+        chunk_texts = []
 
         for start in range(0, len(words), chunk_size - overlap):
             end = min(start + chunk_size, len(words))
-            chunk_content = ' '.join(words[start:end])
-            encoding = self.encode_chunk(chunk_content)
+            chunk_texts.append(' '.join(words[start:end]))
+
+        # Boilerplate repeated within the document or already stored in any
+        # corpus reuses its vector instead of going through the model again.
+        encoder = get_encoder()
+        encodings, report = encode_deduplicated(encoder, chunk_texts, self.stored_vectors)
+        signature = vector_signature(encoder)
+        chunks = []
+        for chunk_content, encoding in zip(chunk_texts, encodings):
             chunk = Chunk.objects.create(
                 document=document,
                 seq=len(chunks) + 1,
                 chunk_txt=chunk_content,
-                vector=encoding.decode('utf-8'),
+                vector=encoding.tolist(),
+                vector_signature=signature,
                 chunk_size=len(chunk_content.split()),
                 created_by=document.created_by
             )
@@ -85,8 +89,19 @@ class ProcessDocumentView(View):
 
         document.num_chunks = len(chunks)
         document.save()
+        return report
+
+    def stored_vectors(self, hashes):
+        """Vectors of already stored chunks, keyed by text hash"""
+        found = {}
+        for start in range(0, len(hashes), 500):
+            rows = Chunk.objects.filter(text_hash__in=hashes[start:start + 500]) \
+                .values_list('text_hash', 'vector')
+            for digest, vector in rows:
+                if vector:
+                    found.setdefault(digest, vector)
+        return found
 
     def encode_chunk(self, chunk_content):
-        # Example encoding logic
-        # Replace with your actual encoding logic
-        return chunk_content.encode('utf-8')
+        # Shared, process-wide encoder for the default model
+        return get_encoder().encode_text(chunk_content)
@@ -0,0 +1,77 @@
+'''Recall vs latency comparison of approximate FAISS indexes against exact search'''
+# vector_db/benchmark.py
+import time
+from typing import Dict, List
+import numpy as np
+from numpy.typing import NDArray
+from .faiss_db import FAISSIndex
+
+# Search-time knobs accepted by FAISSIndex.search_vectors
+SEARCH_OPTIONS = ('nprobe', 'ef_search')
+
+
+def recall_at_k(exact_ids: NDArray, approx_ids: NDArray) -> float:
+    """Fraction of the exact top-k neighbors that the approximate search also found"""
+    hits = sum(len(set(exact[exact >= 0]) & set(approx[approx >= 0]))
+               for exact, approx in zip(exact_ids, approx_ids))
+    total = int((exact_ids >= 0).sum())
+    return hits / total if total else 1.0
+
+
+def _timed_search(index: FAISSIndex, queries: NDArray, k: int, **search_options):
+    """Search one query at a time, as the API does; returns (ids, mean ms/query)"""
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        _, found = index.search_vectors(query, k, **search_options)
+        ids.append(found[0])
+    elapsed = time.perf_counter() - start
+    return np.array(ids), elapsed * 1000 / max(len(queries), 1)
+
+
+def measure_recall_latency(vectors: NDArray,
+                           queries: NDArray,
+                           configs: List[Dict],
+                           k: int = 10,
+                           train_size: int = 10000) -> List[Dict]:
+    """Build each index config over vectors and compare it with exact flat search
+
+    Args:
+        vectors: Corpus vectors to index
+        queries: Query vectors
+        configs: FAISSIndex options per run, e.g. {'index_type': 'ivf_flat',
+            'nlist': 256, 'nprobe': 8}; 'nprobe'/'ef_search' are used at query time
+        k: Neighbors per query
+        train_size: Number of vectors sampled to train IVF indexes
+
+    Returns:
+        One row per config (flat baseline first) with recall@k, mean query
+        latency in milliseconds and build (train + add) seconds
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    dimension = vectors.shape[1]
+    rng = np.random.default_rng(0)
+
+    exact = FAISSIndex(dimension)
+    start = time.perf_counter()
+    exact.add_vectors(vectors)
+    build_seconds = time.perf_counter() - start
+    exact_ids, latency_ms = _timed_search(exact, queries, k)
+    results = [{'index_type': 'flat', 'recall': 1.0,
+                'latency_ms': latency_ms, 'build_seconds': build_seconds}]
+
+    for config in configs:
+        search_options = {key: config[key] for key in SEARCH_OPTIONS if key in config}
+        index_options = {key: value for key, value in config.items() if key not in SEARCH_OPTIONS}
+        index = FAISSIndex(dimension, **index_options)
+        start = time.perf_counter()
+        if not index.is_trained:
+            sample = rng.choice(len(vectors), min(train_size, len(vectors)), replace=False)
+            index.train(vectors[sample])
+        index.add_vectors(vectors)
+        build_seconds = time.perf_counter() - start
+        approx_ids, latency_ms = _timed_search(index, queries, k, **search_options)
+        results.append({**config, 'recall': recall_at_k(exact_ids, approx_ids),
+                        'latency_ms': latency_ms, 'build_seconds': build_seconds})
+    return results
@@ -1,47 +1,224 @@
 '''this file is for the FAISS database'''
 # vector_db/faiss_db.py
+import copy
+import logging
 import faiss
 import numpy as np
 import os
 from ui.models import Chunk
-from transformers import AutoTokenizer, AutoModel
 from django.conf import settings
-from typing import Optional, Tuple, Callable, List
+from encoder.services.batcher import get_batcher
+from encoder.services.dedup import vector_signature
+from encoder.services.registry import get_encoder
+from typing import Optional, Tuple, Callable, Dict, Iterable, List
 from numpy.typing import NDArray
+from .vector_store import VectorStore
 
-# Initialize the tokenizer and model
-default_model  = settings.TRANSFORMER_SETTINGS['models']['default']
-tokenizer = AutoTokenizer.from_pretrained(default_model)
-model = AutoModel.from_pretrained(default_model)
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'hnsw', 'ivf_pq')
+
+# Filtered hnsw searches over at most this many chunks skip the graph and
+# compare against each allowed vector directly
+EXACT_FILTER_SIZE = 4096
+
+def id_selector(ids: NDArray) -> Tuple[faiss.IDSelector, NDArray]:
+    """faiss IDSelector accepting ids
+
+    Dense ID sets get a bitmap over [0, max id], sparse ones a hashed batch.
+    The returned array backs the selector and must outlive the search.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    max_id = int(ids.max()) if len(ids) else 0
+    if (max_id >> 3) + 1 <= len(ids) * 8:
+        bitmap = np.zeros((max_id >> 3) + 1, dtype=np.uint8)
+        np.bitwise_or.at(bitmap, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+        return faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)), bitmap
+    return faiss.IDSelectorBatch(ids), ids
+
+def default_dimension() -> int:
+    """Index dimension: TRANSFORMER_SETTINGS['db_dimension'] if set, else the default encoder's
+
+    Following the encoder keeps the index in step with output_dim projections.
+    """
+    configured = settings.TRANSFORMER_SETTINGS.get('db_dimension')
+    if configured:
+        return configured
+    dimension = get_encoder().dimension
+    return dimension() if callable(dimension) else dimension
 
 #pylint: disable=E1120 E1101
 class FAISSIndex:
     """FAISS vector index wrapper for similarity search"""
 
-    def __init__(self, dimension: int):
+    def __init__(self,
+                 dimension: int,
+                 index_type: str = 'flat',
+                 nlist: int = 100,
+                 hnsw_m: int = 32,
+                 ef_construction: int = 40,
+                 pq_m: int = 64,
+                 pq_nbits: int = 8,
+                 opq: bool = False,
+                 vectors_path: Optional[str] = None,
+                 rerank_factor: int = 4):
         """Initialize FAISS index
         
         Args:
             dimension: Vector dimension size
+            index_type: 'flat' (exact), 'ivf_flat' or 'hnsw' (approximate)
+            nlist: Number of IVF clusters; ivf_flat must be trained first
+            hnsw_m: Neighbors per HNSW graph node
+            ef_construction: HNSW build-time search depth
+            pq_m: ivf_pq sub-quantizers; each vector is stored in
+                pq_m * pq_nbits / 8 bytes instead of dimension * 4
+            pq_nbits: Bits per ivf_pq sub-quantizer code
+            opq: Rotate vectors with OPQ before product quantization
+            vectors_path: Keep the original vectors in a VectorStore at this
+                path and re-rank compressed search results exactly
+            rerank_factor: Candidates fetched per requested result when re-ranking
         """
         if dimension <= 0:
             raise ValueError("Dimension must be positive")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        if index_type == 'ivf_pq' and dimension % pq_m:
+            raise ValueError(f"Dimension {dimension} is not divisible by pq_m={pq_m}")
 
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self._total_vectors = 0
-        self.chunk_ids = []  # Store chunk IDs
+        self.index_type = index_type
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.opq = opq
+        self.rerank_factor = rerank_factor
+        self.vectors = VectorStore(vectors_path, dimension) if vectors_path else None
+        self.index = self._build_index()
+        self.mapped_path: Optional[str] = None  # Set while the index is memory-mapped
+
+    def _build_index(self):
+        """Build an empty index that stores chunk IDs as its labels
+
+        IVF indexes keep IDs natively; flat and HNSW are wrapped in
+        IndexIDMap2 (IDMap over IVF mislabels vectors after remove_ids).
+        """
+        if self.index_type == 'ivf_flat':
+            quantizer = faiss.IndexFlatL2(self.dimension)
+            return faiss.IndexIVFFlat(quantizer, self.dimension, self.nlist)
+        if self.index_type == 'ivf_pq':
+            rotation = f"OPQ{self.pq_m}," if self.opq else ""
+            return faiss.index_factory(
+                self.dimension, f"{rotation}IVF{self.nlist},PQ{self.pq_m}x{self.pq_nbits}")
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m)
+            index.hnsw.efConstruction = self.ef_construction
+            return faiss.IndexIDMap2(index)
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(self.dimension))
+
+    @property
+    def code_size(self) -> int:
+        """Bytes stored in the index per vector (excluding IDs)"""
+        if self.index_type == 'ivf_pq':
+            return faiss.extract_index_ivf(self.index).code_size
+        return self.dimension * 4
+
+    @property
+    def min_training_size(self) -> int:
+        if self.index_type == 'ivf_pq':
+            return max(self.nlist, 2 ** self.pq_nbits)
+        return self.nlist
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether vectors can be added; only IVF indexes need training"""
+        return self.index.is_trained
+
+    def train(self, vectors: NDArray) -> None:
+        """Train the index on a representative sample of vectors
+
+        IVF indexes need at least ``nlist`` (ideally 30-100x more) samples,
+        and ivf_pq also at least 2 ** pq_nbits.
+        Flat and HNSW indexes need no training and ignore this call.
+        """
+        if self.is_trained:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Training vectors must have dimension {self.dimension}")
+        if len(vectors) < self.min_training_size:
+            raise ValueError(
+                f"Need at least {self.min_training_size} training vectors, got {len(vectors)}")
+        self.index.train(vectors)
+
+    def train_from_chunks(self, sample_size: int = 10000, signature: Optional[str] = None) -> int:
+        """Train on a random sample of the vectors stored on Chunk rows
+
+        Rows whose vector is not numeric or not of the index dimension (such
+        as old rows holding the chunk text) are skipped.
+
+        Args:
+            sample_size: Most rows to sample
+            signature: Only sample rows with this Chunk.vector_signature
+
+        Returns:
+            Number of vectors trained on
+        """
+        chunks = Chunk.objects.all()
+        if signature is not None:
+            chunks = chunks.filter(vector_signature=signature)
+        sample = []
+        for vector in chunks.order_by('?').values_list('vector', flat=True)[:sample_size]:
+            try:
+                vector = np.asarray(vector, dtype=np.float32)
+            except (TypeError, ValueError):
+                continue
+            if vector.shape == (self.dimension,):
+                sample.append(vector)
+        sample = np.array(sample, dtype=np.float32).reshape(-1, self.dimension)
+        self.train(sample)
+        return len(sample)
+
+    def _search_params(self,
+                       nprobe: Optional[int] = None,
+                       ef_search: Optional[int] = None,
+                       selector: Optional[faiss.IDSelector] = None):
+        """Per-query search knobs for the approximate index types
+
+        selector restricts the search to the chunk IDs it accepts.
+        """
+        if self.index_type.startswith('ivf') and (nprobe or selector):
+            params = faiss.SearchParametersIVF(sel=selector)
+            params.nprobe = nprobe or faiss.extract_index_ivf(self.index).nprobe
+            if self.opq:
+                return faiss.SearchParametersPreTransform(index_params=params)
+            return params
+        if self.index_type == 'hnsw' and (ef_search or selector):
+            params = faiss.SearchParametersHNSW(sel=selector)
+            params.efSearch = ef_search or faiss.downcast_index(self.index.index).hnsw.efSearch
+            return params
+        if selector is not None:
+            return faiss.SearchParameters(sel=selector)
+        return None
+
+    def _check_trained(self):
+        if not self.is_trained:
+            raise ValueError(f"{self.index_type} index must be trained before adding vectors")
 
     def add_vectors(self,
                    vectors: NDArray,
                    batch_size: int = 1000,
-                   progress_callback: Optional[Callable[[float], None]] = None) -> None:
+                   progress_callback: Optional[Callable[[float], None]] = None,
+                   ids: Optional[Iterable[int]] = None) -> None:
         """Add vectors to index in batches
         
         Args:
             vectors: Numpy array of vectors to add
             batch_size: Number of vectors per batch
             progress_callback: Optional callback for progress updates
+            ids: Chunk IDs of the vectors; defaults to consecutive IDs
+                starting at ntotal
         """
         if not isinstance(vectors, np.ndarray):
             raise TypeError("Vectors must be numpy array")
@@ -50,10 +227,16 @@ class FAISSIndex:
             raise ValueError(f"Vectors must have dimension {self.dimension}")
 
         total_vectors = len(vectors)
+        if ids is None:
+            ids = np.arange(self.ntotal, self.ntotal + total_vectors, dtype=np.int64)
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids) != total_vectors:
+            raise ValueError("ids and vectors must have the same length")
+        if total_vectors:
+            self._check_trained()
         for i in range(0, total_vectors, batch_size):
-            batch = vectors[i:min(i + batch_size, total_vectors)]
-            self.index.add(batch.astype(np.float32))
-            self._total_vectors += len(batch)
+            end = min(i + batch_size, total_vectors)
+            self._add(ids[i:end], vectors[i:end])
 
             if progress_callback:
                 progress = min((i + batch_size) / total_vectors, 1.0)
@@ -61,15 +244,21 @@ class FAISSIndex:
 
     def search_vectors(self,
                       query_vector: NDArray,
-                      k: int = 5) -> Tuple[NDArray, NDArray]:
+                      k: int = 5,
+                      nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None,
+                      selector: Optional[faiss.IDSelector] = None) -> Tuple[NDArray, NDArray]:
         """Search for similar vectors
         
         Args:
             query_vector: Vector to search for
             k: Number of results to return
+            nprobe: IVF clusters to visit (ivf_flat and ivf_pq only)
+            ef_search: HNSW search depth (hnsw only)
+            selector: Only return chunk IDs this faiss.IDSelector accepts
             
         Returns:
-            Tuple of (distances, indices)
+            Tuple of (distances, chunk IDs); -1 pads missing results
         """
         if len(query_vector.shape) == 1:
             query_vector = query_vector.reshape(1, -1)
@@ -77,35 +266,261 @@ class FAISSIndex:
         if query_vector.shape[1] != self.dimension:
             raise ValueError(f"Query vector must have dimension {self.dimension}")
 
-        return self.index.search(query_vector.astype(np.float32), k)
+        query_vector = query_vector.astype(np.float32)
+        params = self._search_params(nprobe, ef_search, selector)
+        if self.vectors is None:
+            return self.index.search(query_vector, k, params=params)
+        _, candidates = self.index.search(query_vector, k * self.rerank_factor, params=params)
+        return self._rerank(query_vector, candidates, k)
+
+    def _check_writable(self):
+        # faiss aborts the process, rather than raising, when a mapped index is resized
+        if self.mapped_path:
+            raise ValueError("Index was loaded with mmap and is read-only; load it without mmap to modify it")
+
+    def _add(self, ids: NDArray, vectors: NDArray) -> None:
+        """Add vectors to the index, and to the vector store when re-ranking"""
+        self._check_writable()
+        vectors = vectors.astype(np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.vectors is not None:
+            self.vectors.append(ids, vectors)
+        self.index.add_with_ids(vectors, ids)
+
+    def search_filtered(self,
+                        query_vector: NDArray,
+                        k: int,
+                        allowed_ids: NDArray,
+                        nprobe: Optional[int] = None,
+                        ef_search: Optional[int] = None) -> Tuple[NDArray, NDArray]:
+        """Search only among allowed_ids, e.g. from filter_chunk_ids()
+
+        The filter is applied inside the FAISS scan, so every query gets
+        min(k, matching vectors) hits without over-fetching. Rows where an
+        approximate index comes up short are searched again exhaustively:
+        IVF with every list probed, hnsw by brute force.
+
+        Returns:
+            Tuple of (distances, chunk IDs); -1 pads missing results
+        """
+        queries = np.atleast_2d(query_vector).astype(np.float32)
+        allowed = np.unique(np.asarray(allowed_ids, dtype=np.int64))
+        if self.index_type == 'hnsw':
+            # Only indexed IDs can be reconstructed for the brute-force path
+            allowed = allowed[np.isin(allowed, faiss.vector_to_array(self.index.id_map))]
+            if len(allowed) <= EXACT_FILTER_SIZE:
+                return self._exact_search(queries, allowed, k)
+        if not len(allowed) or not self.ntotal:
+            return self._exact_search(queries, allowed[:0], k)
+
+        selector, _bitmap = id_selector(allowed)
+        D, I = self.search_vectors(queries, k, nprobe, ef_search, selector=selector)
+        short = (I >= 0).sum(axis=1) < min(k, len(allowed))
+        if short.any() and self.index_type.startswith('ivf'):
+            D[short], I[short] = self.search_vectors(queries[short], k, self.nlist, selector=selector)
+        elif short.any() and self.index_type == 'hnsw':
+            D[short], I[short] = self._exact_search(queries[short], allowed, k)
+        return D, I
+
+    def _exact_search(self, queries: NDArray, ids: NDArray, k: int) -> Tuple[NDArray, NDArray]:
+        """Brute-force L2 search over the indexed vectors of ids (flat/hnsw only)"""
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        if len(ids):
+            vectors = self.index.reconstruct_batch(ids)
+            D, positions = faiss.knn(queries, vectors, min(k, len(ids)))
+            distances[:, :D.shape[1]] = D
+            indices[:, :D.shape[1]] = ids[positions]
+        return distances, indices
+
+    def _rerank(self, queries: NDArray, candidates: NDArray, k: int) -> Tuple[NDArray, NDArray]:
+        """Exact L2 distances from the stored originals, best k per query"""
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            ids = ids[ids >= 0]
+            exact = ((self.vectors.get(ids) - query) ** 2).sum(axis=1)
+            order = np.argsort(exact, kind='stable')[:k]
+            distances[row, :len(order)] = exact[order]
+            indices[row, :len(order)] = ids[order]
+        return distances, indices
 
     @property
     def ntotal(self) -> int:
         """Get total number of vectors in index"""
-        return self._total_vectors
+        return self.index.ntotal
+
+    def ids(self) -> NDArray:
+        """Chunk IDs stored in the index; works on memory-mapped indexes too"""
+        if not self.index_type.startswith('ivf'):
+            return faiss.vector_to_array(faiss.downcast_index(self.index).id_map).astype(np.int64)
+        invlists = faiss.extract_index_ivf(self.index).invlists
+        ids = []
+        for list_no in range(invlists.nlist):
+            size = invlists.list_size(list_no)
+            if size:
+                pointer = invlists.get_ids(list_no)
+                ids.append(faiss.rev_swig_ptr(pointer, size).copy())
+                invlists.release_ids(list_no, pointer)
+        return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
 
     def add_chunk(self, chunk_id: int, vector: np.ndarray):
         if vector.shape[0] != self.dimension:
             raise ValueError(f"Vector dimension mismatch: {vector.shape[0]} != {self.dimension}")
-        self.index.add(vector.reshape(1, -1).astype(np.float32))
-        self.chunk_ids.append(chunk_id)
+        self._check_trained()
+        self._add([chunk_id], vector.reshape(1, -1))
+
+    def add_chunks(self, chunk_ids: List[int], vectors: np.ndarray):
+        """Add a block of chunk vectors with their chunk IDs"""
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Vectors must have dimension {self.dimension}")
+        if len(chunk_ids) != len(vectors):
+            raise ValueError("chunk_ids and vectors must have the same length")
+        self._check_trained()
+        self._add(chunk_ids, vectors)
+
+    def remove_ids(self, chunk_ids: Iterable[int]) -> int:
+        """Remove the vectors of chunk_ids; unknown IDs are ignored
 
-    def search_similar_chunks(self, query_vector: np.ndarray, k: int = 5):
-        D, I = self.index.search(query_vector.reshape(1, -1).astype(np.float32), k)
-        return [(self.chunk_ids[idx], dist) for dist, idx in zip(D[0], I[0])]
+        Returns:
+            Number of vectors removed
+
+        Raises:
+            ValueError: For hnsw indexes, which cannot delete graph nodes
+        """
+        chunk_ids = np.asarray(list(chunk_ids), dtype=np.int64)
+        if not len(chunk_ids):
+            return 0
+        self._check_writable()
+        if self.index_type == 'hnsw':
+            if not np.isin(chunk_ids, faiss.vector_to_array(self.index.id_map)).any():
+                return 0
+            raise ValueError("hnsw indexes do not support removal; rebuild the index instead")
+        return self.index.remove_ids(faiss.IDSelectorBatch(chunk_ids))
+
+    def upsert_chunks(self, chunk_ids: List[int], vectors: np.ndarray) -> int:
+        """Replace the vectors of chunks already indexed and add new ones
+
+        Returns:
+            Number of previously indexed vectors that were replaced
+        """
+        replaced = self.remove_ids(chunk_ids)
+        self.add_chunks(chunk_ids, vectors)
+        return replaced
+
+    def search_similar_chunks(self, query_vector: np.ndarray, k: int = 5,
+                              nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                              allowed_ids: Optional[NDArray] = None):
+        return self.search_similar_chunks_batch(query_vector.reshape(1, -1), k, nprobe, ef_search,
+                                                allowed_ids)[0]
+
+    def search_similar_chunks_batch(self, query_vectors: np.ndarray, k: int = 5,
+                                    nprobe: Optional[int] = None,
+                                    ef_search: Optional[int] = None,
+                                    allowed_ids: Optional[NDArray] = None) -> List[List[Tuple[int, float]]]:
+        """Search many queries in one FAISS call
+
+        Args:
+            allowed_ids: Restrict hits to these chunk IDs (see search_filtered)
+
+        Returns:
+            One list of (chunk_id, distance) per query row
+        """
+        query_vectors = np.atleast_2d(query_vectors)
+        if allowed_ids is None:
+            D, I = self.search_vectors(query_vectors, k, nprobe, ef_search)
+        else:
+            D, I = self.search_filtered(query_vectors, k, allowed_ids, nprobe, ef_search)
+        return [[(int(idx), dist) for dist, idx in zip(distances, ids) if idx >= 0]
+                for distances, ids in zip(D, I)]
 
     def save(self, path: str):
-        faiss.write_index(self.index, f"{path}.index")
-        np.save(f"{path}.chunk_ids", self.chunk_ids)
+        """Write the index, chunk IDs included, to a single ``{path}.index`` file
+
+        The file is replaced atomically, so processes that have the previous
+        version memory-mapped keep reading a consistent copy.
+        """
+        tmp_path = f"{path}.index.tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, f"{path}.index")
+
+    def load(self, path: str, mmap: bool = False):
+        """Load ``{path}.index``
 
-    def load(self, path: str):
+        Args:
+            path: Path the index was saved to, without the .index suffix
+            mmap: Map the vector data instead of reading it into the heap.
+                Pages are then shared between worker processes through the
+                OS page cache and loading is near-instant, but the index is
+                read-only.
+        """
+        if mmap:
+            # IVF inverted lists and flat code arrays use different mapping flags
+            flag = faiss.IO_FLAG_MMAP if self.index_type.startswith('ivf') else faiss.IO_FLAG_MMAP_IFC
+            self.index = faiss.read_index(f"{path}.index", flag | faiss.IO_FLAG_READ_ONLY)
+            self.mapped_path = f"{path}.index"
+            return
+        self.mapped_path = None
         self.index = faiss.read_index(f"{path}.index")
-        self.chunk_ids = np.load(f"{path}.chunk_ids.npy").tolist()
+        legacy_ids = f"{path}.chunk_ids.npy"
+        if os.path.exists(legacy_ids) and isinstance(self.index, faiss.IndexFlat):
+            # Older saves kept positional chunk IDs next to a plain flat index
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(self.dimension))
+            self.index.add_with_ids(vectors, np.load(legacy_ids).astype(np.int64))
+
+    def memory_report(self) -> Dict[str, Optional[int]]:
+        """Resident versus mapped size of a memory-mapped index
+
+        resident_bytes counts the mapped pages currently in RAM (shared with
+        other processes mapping the same file); it is None where
+        /proc/self/smaps is unavailable.
+        """
+        if not self.mapped_path:
+            return {'mmap': False, 'file_bytes': None, 'mapped_bytes': 0, 'resident_bytes': None}
+        target = os.path.realpath(self.mapped_path)
+        mapped = resident = 0
+        try:
+            with open('/proc/self/smaps', encoding='utf-8') as smaps:
+                in_target = False
+                for line in smaps:
+                    fields = line.split()
+                    if '-' in fields[0] and not fields[0].endswith(':'):
+                        in_target = len(fields) >= 6 and fields[5] == target
+                    elif in_target and fields[0] == 'Size:':
+                        mapped += int(fields[1]) * 1024
+                    elif in_target and fields[0] == 'Rss:':
+                        resident += int(fields[1]) * 1024
+        except OSError:
+            resident = None
+        return {
+            'mmap': True,
+            'file_bytes': os.path.getsize(target),
+            'mapped_bytes': mapped,
+            'resident_bytes': resident,
+        }
 
 class VectorDB:
-    def __init__(self, dimension: int = 768):
-        self.faiss_index = FAISSIndex(dimension)
-        self.index_path = "faiss_index"
+    def __init__(self, dimension: Optional[int] = None, **index_options):
+        """index_options (index_type, nlist, ...) default to settings.VECTOR_DB_SETTINGS
+
+        dimension defaults to default_dimension()
+        """
+        dimension = dimension or default_dimension()
+        config = getattr(settings, 'VECTOR_DB_SETTINGS', {})
+        options = {**config.get('index', {}), **index_options}
+        self.index_path = config.get('index_path', "faiss_index")
+        if options.pop('keep_vectors', False):
+            options.setdefault('vectors_path', f"{self.index_path}.vectors")
+        segments = config.get('segments', {})
+        if segments.get('enabled'):
+            from .segments import SegmentedIndex
+            self.faiss_index = SegmentedIndex(f"{self.index_path}.segments", dimension,
+                                              max_deltas=segments.get('max_deltas', 8),
+                                              mmap=config.get('mmap', False),
+                                              legacy_path=self.index_path, **options)
+        else:
+            self.faiss_index = FAISSIndex(dimension, **options)
 
     def setUp(self):
         self.dimension = 768
@@ -115,24 +530,130 @@ class VectorDB:
         self.test_chunk_ids = list(range(100))
 
 
-    def store_chunks(self, chunks: List[Chunk], batch_size: int = 100):
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            for chunk in batch:
-                vector = encode_chunk(chunk.chunk_txt)
-                self.faiss_index.add_chunk(chunk.id, vector)
+    def store_chunks(self, chunks: Iterable[Chunk], batch_size: int = 100):
+        """Encode and index chunks block by block
+
+        chunks may be a list or a lazy queryset iterator; only one block of
+        texts and vectors is held in memory at a time.
+        """
+        if not self.faiss_index.is_trained:
+            self.faiss_index.train_from_chunks(signature=vector_signature(get_encoder()))
+        pairs = ((chunk.id, chunk.chunk_txt) for chunk in chunks)
+        for chunk_ids, vectors in get_encoder().encode_iter(pairs, batch_size):
+            self.faiss_index.upsert_chunks(chunk_ids, vectors)
         self.faiss_index.save(self.index_path)
 
-    def search_similar(self, query_text: str, k: int = 5):
-        query_vector = encode_chunk(query_text)
-        results = self.faiss_index.search_similar_chunks(query_vector, k)
-        return [Chunk.objects.get(id=chunk_id) for chunk_id, _ in results]
+    def load_index(self, mmap: Optional[bool] = None):
+        """Load the saved index; mmap defaults to VECTOR_DB_SETTINGS['mmap']"""
+        if mmap is None:
+            mmap = getattr(settings, 'VECTOR_DB_SETTINGS', {}).get('mmap', False)
+        self.faiss_index.load(self.index_path, mmap=mmap)
+
+    def remove_chunks(self, chunk_ids: Iterable[int]) -> int:
+        """Drop chunks from the index, e.g. before re-ingesting their document"""
+        removed = self.faiss_index.remove_ids(chunk_ids)
+        self.faiss_index.save(self.index_path)
+        return removed
+
+    def search_similar(self, query_text: str, k: int = 5,
+                       with_text: bool = False, with_vector: bool = False,
+                       nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                       **filters) -> List[Chunk]:
+        """Most similar chunks, best first, each with its ``distance`` set
+
+        See search_similar_batch for the arguments.
+        """
+        query_vector = encode_chunk(query_text).reshape(1, -1)
+        return self.search_similar_batch(query_vector, k, with_text, with_vector,
+                                         nprobe, ef_search, **filters)[0]
+
+    def search_similar_batch(self, queries, k: int = 5,
+                             with_text: bool = False, with_vector: bool = False,
+                             nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                             **filters) -> List[List[Chunk]]:
+        """Search for many queries with one encode_batch and one index search
+
+        Args:
+            queries: Query texts, or an (n, dimension) array of query vectors
+            k: Number of chunks per query
+            with_text: Load chunk_txt up front instead of deferring it
+            with_vector: Load vector up front instead of deferring it
+            nprobe: IVF clusters to visit for these queries (ivf_flat and ivf_pq only)
+            ef_search: HNSW search depth for these queries (hnsw only)
+            filters: filter_chunk_ids() keyword arguments
+
+        Returns:
+            One list of chunks per query, most similar first
+        """
+        query_vectors = encode_queries(queries)
+        if not len(query_vectors):
+            return []
+        results = self.faiss_index.search_similar_chunks_batch(query_vectors, k, nprobe, ef_search,
+                                                               allowed_ids=filter_chunk_ids(**filters))
+        return load_chunks(results, with_text, with_vector)
+
+def filter_chunk_ids(corpus_ids: Optional[Iterable[int]] = None,
+                     document_ids: Optional[Iterable[int]] = None,
+                     created_after=None,
+                     created_before=None) -> Optional[np.ndarray]:
+    """IDs of the chunks matching every given predicate
+
+    Returns:
+        Array of chunk IDs, or None when no predicate is given
+    """
+    if corpus_ids is None and document_ids is None and created_after is None and created_before is None:
+        return None
+    chunks = Chunk.objects.all()
+    if corpus_ids is not None:
+        chunks = chunks.filter(document__corpus_id__in=list(corpus_ids))
+    if document_ids is not None:
+        chunks = chunks.filter(document_id__in=list(document_ids))
+    if created_after is not None:
+        chunks = chunks.filter(created_at__gte=created_after)
+    if created_before is not None:
+        chunks = chunks.filter(created_at__lt=created_before)
+    return np.fromiter(chunks.values_list('id', flat=True).iterator(), dtype=np.int64)
+
+def encode_queries(queries) -> np.ndarray:
+    """Query texts encoded in one batch; an array of query vectors passes through"""
+    if isinstance(queries, np.ndarray):
+        return queries
+    return get_encoder().encode_batch(list(queries))
+
+def load_chunks(results: List[List[Tuple[int, float]]],
+                with_text: bool = False,
+                with_vector: bool = False) -> List[List[Chunk]]:
+    """Replace (chunk_id, distance) hits with Chunk rows, fetched in one query
+
+    Rank order is preserved and each chunk carries its hit's ``distance``.
+    Document and corpus are joined in; the large chunk_txt and vector
+    fields are deferred unless requested. Hits whose chunk row no longer
+    exists (deleted since it was indexed) are dropped.
+    """
+    ids = {chunk_id for hits in results for chunk_id, _ in hits}
+    deferred = [field for field, wanted in (('chunk_txt', with_text), ('vector', with_vector)) if not wanted]
+    chunks = Chunk.objects.select_related('document__corpus').defer(*deferred).in_bulk(ids)
+    if len(chunks) < len(ids):
+        logger.warning("%d indexed chunks no longer exist", len(ids) - len(chunks))
+
+    hydrated, used = [], set()
+    for hits in results:
+        row = []
+        for chunk_id, distance in hits:
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+            if chunk_id in used:
+                # The same chunk can hit several queries with different distances
+                chunk = copy.copy(chunk)
+            used.add(chunk_id)
+            chunk.distance = float(distance)
+            row.append(chunk)
+        hydrated.append(row)
+    return hydrated
 
 def encode_chunk(chunk_text):
-    '''Encode a chunk of text'''
-    inputs = tokenizer(chunk_text, return_tensors="pt", truncation=True, padding=True)
-    outputs = model(**inputs)
-    vector = outputs.last_hidden_state.mean(dim=1).detach().numpy()
-    return vector
+    '''Encode a chunk of text through the default model's shared micro-batcher'''
+    return get_batcher().encode(chunk_text)
 
 #pylint: enable=E1120 E1101
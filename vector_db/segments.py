@@ -0,0 +1,376 @@
+'''Segmented vector index: a base index plus append-only delta segments'''
+# vector_db/segments.py
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import faiss
+import numpy as np
+from numpy.typing import NDArray
+from .faiss_db import FAISSIndex
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+
+
+def _fsync_dir(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_durably(directory: str, filename: str, write) -> None:
+    """Write a file via write(tmp_path), fsync it and rename it into place"""
+    tmp_path = os.path.join(directory, f"{filename}.tmp")
+    write(tmp_path)
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, filename))
+    _fsync_dir(directory)
+
+
+def _contents(index: FAISSIndex) -> Tuple[NDArray, NDArray]:
+    """IDs and vectors of an IndexIDMap2-backed (flat or hnsw) index"""
+    idmap = faiss.downcast_index(index.index)
+    ids = faiss.vector_to_array(idmap.id_map).astype(np.int64)
+    if not len(ids):
+        return ids, np.empty((0, index.dimension), dtype=np.float32)
+    return ids, idmap.index.reconstruct_n(0, idmap.ntotal)
+
+
+class Segment:
+    """One delta: a small flat index plus the chunk IDs it supersedes
+
+    removed holds every ID written or deleted in this segment; those IDs
+    are hidden in all older segments.
+    """
+
+    def __init__(self, dimension: int, name: Optional[str] = None, removed: Iterable[int] = ()):
+        self.name = name  # Saved as {name}.index; None while pending or if nothing was added
+        self.index = FAISSIndex(dimension)
+        self.removed: Set[int] = set(int(id_) for id_ in removed)
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+
+class SegmentedIndex:
+    """Vector index whose writes cost O(new data)
+
+    Upserts and removals collect in an in-memory pending segment; save()
+    writes it as a new fsynced delta file and atomically replaces the
+    manifest, so a crash leaves either the old or the new state on disk.
+    Searches fan out over the base, the deltas and the pending segment and
+    merge the results. Once max_deltas deltas exist, a background thread
+    compacts them into a new base.
+
+    Exposes the FAISSIndex methods VectorDB uses, so either can back it.
+    """
+
+    def __init__(self, path: str, dimension: int, max_deltas: int = 8, mmap: bool = False,
+                 legacy_path: Optional[str] = None, **index_options):
+        """Open the segmented index stored in directory path
+
+        Args:
+            path: Directory holding the manifest and segment files
+            dimension: Vector dimension size
+            max_deltas: Delta count that triggers background compaction
+            mmap: Memory-map the base segment (see FAISSIndex.load)
+            legacy_path: Single-file index saved by FAISSIndex.save, imported
+                as the first base when path has no manifest yet
+            index_options: FAISSIndex options for the base segment
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self.dimension = dimension
+        self.max_deltas = max_deltas
+        self.mmap = mmap
+        self.index_options = index_options
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._pending = Segment(dimension)
+        self.load()
+
+    def _new_base(self) -> FAISSIndex:
+        return FAISSIndex(self.dimension, **self.index_options)
+
+    @property
+    def index_type(self) -> str:
+        return self._base.index_type
+
+    @property
+    def is_trained(self) -> bool:
+        """Deltas are flat, so writes never wait for the base to be trained"""
+        return True
+
+    def train_from_chunks(self, sample_size: int = 10000, signature: Optional[str] = None) -> int:
+        return 0
+
+    @property
+    def ntotal(self) -> int:
+        """Vectors across all segments, including superseded ones not yet compacted"""
+        with self._lock:
+            return (self._base.ntotal + sum(delta.ntotal for delta in self._deltas)
+                    + self._pending.ntotal)
+
+    def load(self, path: Optional[str] = None, mmap: Optional[bool] = None) -> None:
+        """(Re)open the segments listed in the manifest; pending writes are kept
+
+        Like save(), path is accepted for FAISSIndex compatibility and ignored.
+        """
+        if mmap is not None:
+            self.mmap = mmap
+        manifest = {'base': None, 'deltas': [], 'next_seq': 1}
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        elif self.legacy_path and os.path.exists(f"{self.legacy_path}.index"):
+            manifest = self._import_legacy()
+
+        base = self._new_base()
+        if manifest['base']:
+            base.load(os.path.join(self.path, manifest['base']), mmap=self.mmap)
+        deltas = []
+        for entry in manifest['deltas']:
+            delta = Segment(self.dimension, entry['name'], entry['removed'])
+            if entry['name']:
+                delta.index.load(os.path.join(self.path, entry['name']))
+            deltas.append(delta)
+        with self._lock:
+            self._manifest = manifest
+            self._base = base
+            self._deltas = deltas
+
+    def _import_legacy(self) -> Dict:
+        """Write the legacy single-file index as base-000000 and return its manifest"""
+        legacy = self._new_base()
+        legacy.load(self.legacy_path)  # Also migrates .chunk_ids.npy saves
+        os.makedirs(self.path, exist_ok=True)
+        self._write_index(legacy, 'base-000000')
+        manifest = {'base': 'base-000000', 'deltas': [], 'next_seq': 1}
+        self._write_manifest(manifest)
+        logger.info("Imported %s.index into %s", self.legacy_path, self.path)
+        return manifest
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+        _write_durably(self.path, MANIFEST, write)
+
+    def _write_index(self, index: FAISSIndex, name: str) -> None:
+        """Durably write index as ``{name}.index`` in the segment directory"""
+        _write_durably(self.path, f"{name}.index", lambda tmp_path: faiss.write_index(index.index, tmp_path))
+
+    def add_chunks(self, chunk_ids: List[int], vectors: np.ndarray) -> None:
+        self.upsert_chunks(chunk_ids, vectors)
+
+    def upsert_chunks(self, chunk_ids: List[int], vectors: np.ndarray) -> int:
+        """Stage new or changed chunk vectors; they are searchable at once
+
+        Returns:
+            Number of vectors replaced within the pending segment
+        """
+        with self._lock:
+            replaced = self._pending.index.upsert_chunks(chunk_ids, vectors)
+            self._pending.removed.update(int(id_) for id_ in chunk_ids)
+        return replaced
+
+    def remove_ids(self, chunk_ids: Iterable[int]) -> int:
+        """Stage removal of chunk_ids from every segment
+
+        Returns:
+            Number of IDs marked as removed
+        """
+        chunk_ids = [int(id_) for id_ in chunk_ids]
+        with self._lock:
+            self._pending.index.remove_ids(chunk_ids)
+            self._pending.removed.update(chunk_ids)
+        return len(chunk_ids)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Persist the pending segment as a new delta
+
+        path is fixed at construction; the argument is accepted for
+        FAISSIndex compatibility and ignored.
+        """
+        with self._lock:
+            pending = self._pending
+            if not pending.ntotal and not pending.removed:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            seq = self._manifest['next_seq']
+            if pending.ntotal:
+                pending.name = f"delta-{seq:06d}"
+                self._write_index(pending.index, pending.name)
+            manifest = dict(self._manifest, next_seq=seq + 1, deltas=self._manifest['deltas'] + [
+                {'name': pending.name, 'removed': sorted(pending.removed)}])
+            self._write_manifest(manifest)
+            self._manifest = manifest
+            self._deltas.append(pending)
+            self._pending = Segment(self.dimension)
+            should_compact = len(self._deltas) >= self.max_deltas
+        if should_compact:
+            self.compact_in_background()
+
+    def search_vectors(self,
+                       query_vector: NDArray,
+                       k: int = 5,
+                       nprobe: Optional[int] = None,
+                       ef_search: Optional[int] = None) -> Tuple[NDArray, NDArray]:
+        """Search every segment and merge the best k per query
+
+        Returns:
+            Tuple of (distances, chunk IDs); -1 pads missing results
+        """
+        queries = np.atleast_2d(query_vector).astype(np.float32)
+        return self._fan_out(queries, k, lambda index, hidden: self._search_segment(
+            index, queries, k, hidden, nprobe, ef_search))
+
+    def search_filtered(self,
+                        query_vector: NDArray,
+                        k: int,
+                        allowed_ids: NDArray,
+                        nprobe: Optional[int] = None,
+                        ef_search: Optional[int] = None) -> Tuple[NDArray, NDArray]:
+        """FAISSIndex.search_filtered over every segment"""
+        queries = np.atleast_2d(query_vector).astype(np.float32)
+        allowed = np.unique(np.asarray(allowed_ids, dtype=np.int64))
+
+        def search(index, hidden):
+            if not index.ntotal:
+                return None
+            visible = np.setdiff1d(allowed, list(hidden), assume_unique=True) if hidden else allowed
+            return index.search_filtered(queries, k, visible, nprobe, ef_search)
+
+        return self._fan_out(queries, k, search)
+
+    def _fan_out(self, queries: NDArray, k: int, search) -> Tuple[NDArray, NDArray]:
+        """Run search(index, hidden_ids) on every segment and merge the hits"""
+        with self._lock:
+            segments = [self._base] + [delta.index for delta in self._deltas]
+            removed = [delta.removed for delta in self._deltas]
+            # The pending segment is mutable, so it is searched under the lock
+            pending_hits = search(self._pending.index, set())
+            removed.append(set(self._pending.removed))
+
+        hits = [pending_hits]
+        hidden: Set[int] = set(removed[-1])
+        # Newest to oldest: each segment hides IDs superseded by newer ones
+        for segment, superseding in zip(reversed(segments), [set()] + list(reversed(removed[:-1]))):
+            hidden |= superseding
+            hits.append(search(segment, hidden))
+        return self._merge(hits, len(queries), k)
+
+    def _search_segment(self, index: FAISSIndex, queries: NDArray, k: int, hidden: Set[int],
+                        nprobe: Optional[int], ef_search: Optional[int]):
+        if not index.ntotal:
+            return None
+        if not hidden:
+            return index.search_vectors(queries, k, nprobe, ef_search)
+        # Keep both selectors referenced while faiss uses them
+        batch = faiss.IDSelectorBatch(np.fromiter(hidden, dtype=np.int64, count=len(hidden)))
+        selector = faiss.IDSelectorNot(batch)
+        return index.search_vectors(queries, k, nprobe, ef_search, selector=selector)
+
+    @staticmethod
+    def _merge(hits, num_queries: int, k: int) -> Tuple[NDArray, NDArray]:
+        hits = [hit for hit in hits if hit is not None]
+        if not hits:
+            return (np.full((num_queries, k), np.inf, dtype=np.float32),
+                    np.full((num_queries, k), -1, dtype=np.int64))
+        distances = np.hstack([D for D, _ in hits])
+        ids = np.hstack([I for _, I in hits])
+        distances = np.where(ids >= 0, distances, np.inf)
+        order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+        return (np.take_along_axis(distances, order, axis=1).astype(np.float32),
+                np.take_along_axis(ids, order, axis=1))
+
+    # Result shaping is identical to FAISSIndex
+    search_similar_chunks = FAISSIndex.search_similar_chunks
+    search_similar_chunks_batch = FAISSIndex.search_similar_chunks_batch
+
+    def memory_report(self):
+        return self._base.memory_report()
+
+    def compact(self) -> bool:
+        """Merge all saved deltas into a new base segment
+
+        Returns:
+            False if there was nothing to merge, or an untrained base could
+            not be trained on the delta vectors yet
+        """
+        with self._compact_lock:
+            with self._lock:
+                merged = list(self._deltas)
+                manifest = self._manifest
+                if not merged:
+                    return False
+                # Reserve the base's sequence number so saves made while the
+                # base is written cannot reuse it for a delta
+                seq = manifest['next_seq']
+                self._manifest = dict(manifest, next_seq=seq + 1)
+
+            base = self._new_base()
+            if manifest['base']:
+                base.load(os.path.join(self.path, manifest['base']))
+            if base.index_type == 'hnsw':
+                # hnsw cannot delete nodes, so the graph is rebuilt
+                ids, vectors = _contents(base)
+                base = self._new_base()
+                for delta in merged:
+                    keep = ~np.isin(ids, list(delta.removed))
+                    delta_ids, delta_vectors = _contents(delta.index)
+                    ids = np.concatenate([ids[keep], delta_ids])
+                    vectors = np.vstack([vectors[keep], delta_vectors])
+                base.add_chunks(ids, vectors)
+            else:
+                if not base.is_trained:
+                    sample = np.vstack([_contents(delta.index)[1] for delta in merged])
+                    if len(sample) < base.min_training_size:
+                        return False
+                    base.train(sample)
+                for delta in merged:
+                    base.remove_ids(delta.removed)
+                    base.add_chunks(*_contents(delta.index))
+
+            self._write_index(base, f"base-{seq:06d}")
+            if self.mmap:
+                base.load(os.path.join(self.path, f"base-{seq:06d}"), mmap=True)
+            with self._lock:
+                remaining = self._deltas[len(merged):]
+                new_manifest = dict(self._manifest, base=f"base-{seq:06d}",
+                                    next_seq=max(self._manifest['next_seq'], seq + 1),
+                                    deltas=self._manifest['deltas'][len(merged):])
+                self._write_manifest(new_manifest)
+                self._manifest = new_manifest
+                self._base = base
+                self._deltas = remaining
+
+            obsolete = [delta.name for delta in merged if delta.name]
+            if manifest['base']:
+                obsolete.append(manifest['base'])
+            for name in obsolete:
+                os.remove(os.path.join(self.path, f"{name}.index"))
+            return True
+
+    def _compact_quietly(self) -> None:
+        try:
+            self.compact()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Compacting %s failed", self.path)
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        """Start compaction in a daemon thread unless one is already running"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return None
+        self._compactor = threading.Thread(target=self._compact_quietly, name='vector-compactor', daemon=True)
+        self._compactor.start()
+        return self._compactor
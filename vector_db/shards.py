@@ -0,0 +1,415 @@
+'''Per-corpus sharded vector indexes with parallel fan-out search'''
+# vector_db/shards.py
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from django.conf import settings
+from encoder.services.registry import get_encoder
+from ui.models import Chunk
+from .faiss_db import FAISSIndex, default_dimension, encode_queries, filter_chunk_ids, load_chunks
+
+LAYOUT = 'shards.json'
+# Untrained IVF shards are flat buffers saved as {name}.buffer.index
+BUFFER = '.buffer'
+# k-means wants about this many training points per IVF centroid
+POINTS_PER_CENTROID = 39
+
+ShardKey = Tuple[int, str]  # (corpus_id, shard name)
+
+
+def shard_bytes(index: FAISSIndex) -> int:
+    """Approximate memory held by a loaded shard: codes, IDs and graph links"""
+    per_vector = index.code_size + 8
+    if index.index_type == 'hnsw':
+        per_vector += index.hnsw_m * 2 * 4
+    return index.ntotal * per_vector
+
+
+class ReadWriteLock:
+    """Any number of readers or a single writer; waiting writers go first"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class ShardManager:
+    """One index directory per corpus, split into size-capped sub-shards
+
+    New vectors fill a corpus's newest sub-shard until it holds
+    max_shard_vectors, then a new one is started. Loaded shards form an LRU
+    cache; when their estimated size exceeds memory_budget_bytes the least
+    recently used are saved if modified and unloaded.
+
+    IVF shards cannot be trained on the first block that reaches them, so
+    a new shard of an IVF type starts as a flat buffer and is converted
+    once it holds train_size vectors, trained on all of them.
+
+    Which sub-shard holds each chunk is tracked per corpus, so an upsert
+    only touches the shards that really contain its chunks. Searches hold
+    a shard's read lock and writes its write lock, as FAISS does not allow
+    adding or removing while searching.
+    """
+
+    def __init__(self,
+                 root: str,
+                 dimension: int,
+                 max_shard_vectors: int = 1_000_000,
+                 memory_budget_bytes: Optional[int] = None,
+                 max_workers: int = 4,
+                 mmap: bool = False,
+                 train_size: Optional[int] = None,
+                 **index_options):
+        """
+        Args:
+            root: Directory holding one corpus-<id> directory per corpus
+            dimension: Vector dimension size
+            max_shard_vectors: Sub-shard size cap
+            memory_budget_bytes: Loaded shard budget; None means unlimited
+            max_workers: Threads searching shards in parallel
+            mmap: Memory-map shards loaded for search
+            train_size: Vectors an IVF shard buffers before it is trained;
+                defaults to 39 per centroid, capped at max_shard_vectors
+            index_options: FAISSIndex options for every shard
+        """
+        self.root = root
+        self.dimension = dimension
+        self.max_shard_vectors = max_shard_vectors
+        self.memory_budget_bytes = memory_budget_bytes
+        self.mmap = mmap
+        self.index_options = index_options
+        template = FAISSIndex(dimension, **index_options)
+        self.buffered = not template.is_trained
+        self.train_size = max(template.min_training_size,
+                              min(train_size or POINTS_PER_CENTROID * template.min_training_size,
+                                  max_shard_vectors))
+        self._lock = threading.RLock()
+        self._loaded: 'OrderedDict[ShardKey, FAISSIndex]' = OrderedDict()
+        self._dirty = set()
+        self._layouts: Dict[int, List[str]] = {}
+        self._locations: Dict[int, Dict[int, str]] = {}  # corpus -> chunk ID -> shard name
+        self._shard_locks: Dict[ShardKey, ReadWriteLock] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vector-shard')
+        self.evictions = 0
+
+    def _corpus_dir(self, corpus_id: int) -> str:
+        return os.path.join(self.root, f"corpus-{corpus_id}")
+
+    def _shard_path(self, key: ShardKey) -> str:
+        return os.path.join(self._corpus_dir(key[0]), key[1])
+
+    def corpus_ids(self) -> List[int]:
+        """Corpora with an index on disk or pending in memory"""
+        on_disk = set()
+        if os.path.isdir(self.root):
+            on_disk = {int(name.split('-', 1)[1]) for name in os.listdir(self.root)
+                       if name.startswith('corpus-')}
+        with self._lock:
+            return sorted(on_disk | {cid for cid, names in self._layouts.items() if names})
+
+    def shard_names(self, corpus_id: int) -> List[str]:
+        with self._lock:
+            if corpus_id not in self._layouts:
+                path = os.path.join(self._corpus_dir(corpus_id), LAYOUT)
+                names = []
+                if os.path.exists(path):
+                    with open(path, encoding='utf-8') as f:
+                        names = json.load(f)['shards']
+                self._layouts[corpus_id] = names
+            return list(self._layouts[corpus_id])
+
+    def _write_layout(self, corpus_id: int) -> None:
+        directory = self._corpus_dir(corpus_id)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f"{LAYOUT}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'shards': self._layouts[corpus_id]}, f)
+        os.replace(tmp_path, os.path.join(directory, LAYOUT))
+
+    def _is_buffer(self, index: FAISSIndex) -> bool:
+        return self.buffered and index.index_type == 'flat'
+
+    def _open(self, key: ShardKey, mmap: bool = False) -> FAISSIndex:
+        """Read a shard from disk, or start an empty one (a buffer for IVF types)"""
+        path = self._shard_path(key)
+        if os.path.exists(f"{path}.index"):
+            index = FAISSIndex(self.dimension, **self.index_options)
+            index.load(path, mmap=mmap)
+            return index
+        index = FAISSIndex(self.dimension) if self.buffered else FAISSIndex(self.dimension, **self.index_options)
+        if os.path.exists(f"{path}{BUFFER}.index"):
+            index.load(f"{path}{BUFFER}", mmap=mmap)
+        return index
+
+    def _save_shard(self, key: ShardKey, index: FAISSIndex) -> None:
+        path = self._shard_path(key)
+        if self._is_buffer(index):
+            index.save(f"{path}{BUFFER}")
+            return
+        index.save(path)
+        # The trained shard is complete on disk before its buffer goes away
+        if os.path.exists(f"{path}{BUFFER}.index"):
+            os.remove(f"{path}{BUFFER}.index")
+
+    def _train_buffer(self, key: ShardKey, buffer: FAISSIndex) -> FAISSIndex:
+        """Replace a full buffer shard by a trained index of the configured type"""
+        ids = buffer.ids()
+        vectors = buffer.index.reconstruct_batch(ids)
+        index = FAISSIndex(self.dimension, **self.index_options)
+        index.train(vectors)
+        index.add_chunks(ids, vectors)
+        # Searches already holding the buffer keep reading it unchanged
+        self._loaded[key] = index
+        self._save_shard(key, index)
+        self._dirty.discard(key)
+        return index
+
+    def _shard(self, key: ShardKey, writable: bool = False) -> FAISSIndex:
+        """Return a shard, loading it (and evicting others) if needed"""
+        with self._lock:
+            index = self._loaded.get(key)
+            if index is not None and not (writable and index.mapped_path):
+                self._loaded.move_to_end(key)
+                return index
+            index = self._open(key, mmap=self.mmap and not writable)
+            self._loaded[key] = index
+            self._evict(keep=key)
+            return index
+
+    def _shard_lock(self, key: ShardKey) -> ReadWriteLock:
+        with self._lock:
+            return self._shard_locks.setdefault(key, ReadWriteLock())
+
+    def _chunk_locations(self, corpus_id: int) -> Dict[int, str]:
+        """Chunk ID -> shard name for a corpus, read once from its shards"""
+        with self._lock:
+            if corpus_id not in self._locations:
+                locations = {}
+                for name in self.shard_names(corpus_id):
+                    key = (corpus_id, name)
+                    # Read the IDs through a map; the shard is not loaded into the cache
+                    index = self._loaded.get(key)
+                    if index is None:
+                        index = self._open(key, mmap=True)
+                    locations.update(dict.fromkeys(index.ids().tolist(), name))
+                self._locations[corpus_id] = locations
+            return self._locations[corpus_id]
+
+    def _evict(self, keep: ShardKey) -> None:
+        if self.memory_budget_bytes is None:
+            return
+        while self.loaded_bytes() > self.memory_budget_bytes:
+            key = next((key for key in self._loaded if key != keep), None)
+            if key is None:
+                return
+            index = self._loaded.pop(key)
+            if key in self._dirty:
+                self._save_shard(key, index)
+                self._dirty.discard(key)
+            self.evictions += 1
+
+    def loaded_bytes(self) -> int:
+        with self._lock:
+            return sum(shard_bytes(index) for index in self._loaded.values())
+
+    def upsert(self, corpus_id: int, chunk_ids: List[int], vectors: np.ndarray) -> None:
+        """Index chunk vectors of one corpus, replacing any earlier versions"""
+        chunk_ids = [int(chunk_id) for chunk_id in chunk_ids]
+        with self._lock:
+            self.remove(corpus_id, chunk_ids)
+            locations = self._chunk_locations(corpus_id)
+            names = self.shard_names(corpus_id)
+            start = 0
+            while start < len(chunk_ids):
+                if names:
+                    key = (corpus_id, names[-1])
+                    index = self._shard(key, writable=True)
+                if not names or index.ntotal >= self.max_shard_vectors:
+                    key = (corpus_id, f"shard-{len(names):04d}")
+                    names.append(key[1])
+                    self._layouts[corpus_id] = list(names)
+                    self._write_layout(corpus_id)
+                    index = self._shard(key, writable=True)
+                end = min(len(chunk_ids), start + self.max_shard_vectors - index.ntotal)
+                with self._shard_lock(key).writing():
+                    index.add_chunks(chunk_ids[start:end], vectors[start:end])
+                locations.update(dict.fromkeys(chunk_ids[start:end], key[1]))
+                self._dirty.add(key)
+                if self._is_buffer(index) and index.ntotal >= self.train_size:
+                    index = self._train_buffer(key, index)
+                self._evict(keep=key)
+                start = end
+
+    def remove(self, corpus_id: int, chunk_ids: Iterable[int]) -> int:
+        """Remove chunk vectors of one corpus; only shards holding them are loaded"""
+        removed = 0
+        with self._lock:
+            locations = self._chunk_locations(corpus_id)
+            by_shard = defaultdict(list)
+            for chunk_id in chunk_ids:
+                name = locations.get(int(chunk_id))
+                if name is not None:
+                    by_shard[name].append(int(chunk_id))
+            for name, ids in by_shard.items():
+                key = (corpus_id, name)
+                index = self._shard(key, writable=True)
+                with self._shard_lock(key).writing():
+                    count = index.remove_ids(ids)
+                for chunk_id in ids:
+                    del locations[chunk_id]
+                self._dirty.add(key)
+                removed += count
+        return removed
+
+    def save(self) -> None:
+        """Write every modified shard"""
+        with self._lock:
+            for key in list(self._dirty):
+                if key in self._loaded:
+                    self._save_shard(key, self._loaded[key])
+            self._dirty.clear()
+
+    def search(self,
+               query_vectors: np.ndarray,
+               k: int = 5,
+               corpus_ids: Optional[Iterable[int]] = None,
+               nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None,
+               allowed_ids: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """Search the shards of corpus_ids (default: all) in parallel
+
+        allowed_ids further restricts hits, see FAISSIndex.search_filtered.
+
+        Returns:
+            One list of (chunk_id, distance) per query, merged across shards
+        """
+        query_vectors = np.atleast_2d(query_vectors)
+        corpus_ids = self.corpus_ids() if corpus_ids is None else corpus_ids
+        keys = [(corpus_id, name) for corpus_id in corpus_ids for name in self.shard_names(corpus_id)]
+
+        def search_shard(key):
+            index = self._shard(key)
+            with self._shard_lock(key).reading():
+                if not index.ntotal:
+                    return [[] for _ in query_vectors]
+                return index.search_similar_chunks_batch(query_vectors, k, nprobe, ef_search, allowed_ids)
+
+        per_shard = list(self._pool.map(search_shard, keys))
+        return [heapq.nsmallest(k, chain.from_iterable(hits[row] for hits in per_shard),
+                                key=lambda hit: hit[1])
+                for row in range(len(query_vectors))]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'loaded_shards': len(self._loaded),
+                'loaded_bytes': self.loaded_bytes(),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'evictions': self.evictions,
+            }
+
+
+class ShardedVectorDB:
+    """VectorDB counterpart that keeps one index shard per Corpus"""
+
+    def __init__(self, dimension: Optional[int] = None, **index_options):
+        dimension = dimension or default_dimension()
+        config = getattr(settings, 'VECTOR_DB_SETTINGS', {})
+        shards = config.get('shards', {})
+        budget_mb = shards.get('memory_budget_mb')
+        options = {**config.get('index', {}), **index_options}
+        # Re-ranking stores are per index path, which shards do not share
+        options.pop('keep_vectors', None)
+        self.shards = ShardManager(
+            shards.get('root', 'faiss_shards'),
+            dimension,
+            max_shard_vectors=shards.get('max_shard_vectors', 1_000_000),
+            memory_budget_bytes=budget_mb * 1024 * 1024 if budget_mb else None,
+            max_workers=shards.get('max_workers', 4),
+            mmap=config.get('mmap', False),
+            train_size=shards.get('train_size'),
+            **options)
+
+    def store_chunks(self, chunks: Iterable[Chunk], batch_size: int = 100):
+        """Encode chunks and index each into its corpus's shard
+
+        Pass chunks with select_related('document') to avoid a query per chunk.
+        """
+        corpus_of = {}
+
+        def pairs():
+            for chunk in chunks:
+                corpus_of[chunk.id] = chunk.document.corpus_id
+                yield chunk.id, chunk.chunk_txt
+
+        for chunk_ids, vectors in get_encoder().encode_iter(pairs(), batch_size):
+            corpora = np.array([corpus_of.pop(chunk_id) for chunk_id in chunk_ids])
+            for corpus_id in np.unique(corpora):
+                mask = corpora == corpus_id
+                self.shards.upsert(int(corpus_id), np.asarray(chunk_ids)[mask].tolist(), vectors[mask])
+        self.shards.save()
+
+    def search_similar(self, query_text: str, k: int = 5,
+                       corpus_ids: Optional[Iterable[int]] = None,
+                       with_text: bool = False, with_vector: bool = False,
+                       nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                       **filters) -> List[Chunk]:
+        return self.search_similar_batch([query_text], k, corpus_ids, with_text, with_vector,
+                                         nprobe, ef_search, **filters)[0]
+
+    def search_similar_batch(self, queries, k: int = 5,
+                             corpus_ids: Optional[Iterable[int]] = None,
+                             with_text: bool = False, with_vector: bool = False,
+                             nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                             **filters) -> List[List[Chunk]]:
+        """Search query texts or vectors across the shards of corpus_ids (default: all)
+
+        filters (document_ids, created_after, created_before) are applied
+        inside each shard's search; the corpus filter just selects shards.
+        nprobe/ef_search tune every shard's search, and results are hydrated,
+        as in VectorDB.search_similar_batch.
+        """
+        query_vectors = encode_queries(queries)
+        if not len(query_vectors):
+            return []
+        allowed_ids = filter_chunk_ids(**filters)
+        results = self.shards.search(query_vectors, k, corpus_ids, nprobe, ef_search, allowed_ids)
+        return load_chunks(results, with_text, with_vector)
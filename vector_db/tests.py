@@ -1,8 +1,12 @@
 '''vector_db tests'''
 import os
+import shutil
+import tempfile
+import threading
 import faiss
 import numpy as np
 from contextlib import contextmanager
+from unittest import mock
 from django.test import TestCase
 from django.conf import settings
 from ui.models import Keyword, Chunk, Document, Corpus
@@ -182,6 +186,31 @@ class TestChunkStorage(TestCase):
         self.assertEqual(len(results), 5)
         self.assertEqual(results[0].chunk_txt, "Test chunk 0")
 
+class DefaultDimensionTests(TestCase):
+    '''The index dimension follows db_dimension or the default encoder'''
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def make_dbs(self, db_dimension):
+        from vector_db.shards import ShardedVectorDB
+        encoder = mock.Mock(dimension=mock.Mock(return_value=16))
+        transformer_settings = dict(settings.TRANSFORMER_SETTINGS, db_dimension=db_dimension)
+        with self.settings(TRANSFORMER_SETTINGS=transformer_settings,
+                           VECTOR_DB_SETTINGS={'shards': {'root': self.tmpdir}}), \
+                mock.patch('vector_db.faiss_db.get_encoder', return_value=encoder):
+            return VectorDB(), ShardedVectorDB()
+
+    def test_follows_default_encoder(self):
+        db, sharded = self.make_dbs(None)
+        self.assertEqual(db.faiss_index.dimension, 16)
+        self.assertEqual(sharded.shards.dimension, 16)
+
+    def test_db_dimension_setting_wins(self):
+        db, sharded = self.make_dbs(32)
+        self.assertEqual(db.faiss_index.dimension, 32)
+        self.assertEqual(sharded.shards.dimension, 32)
+
 class TestVectorDB2(TestCase):
     def setUp(self):
         self.dimension = 768
@@ -245,3 +274,692 @@ class TestVectorDB2(TestCase):
         with self.assertRaises(ValueError):
             self.db.add_vectors(self.test_vectors, chunk_ids=list(range(50)))
 
+
+
+class ANNIndexTests(TestCase):
+    '''Tests for the approximate index types and training workflow'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 32
+        self.vectors = rng.random((2000, self.dimension), dtype=np.float32)
+
+    def test_unsupported_index_type(self):
+        with self.assertRaises(ValueError):
+            FAISSIndex(self.dimension, index_type='lsh')
+
+    def test_ivf_requires_training(self):
+        index = FAISSIndex(self.dimension, index_type='ivf_flat', nlist=16)
+        self.assertFalse(index.is_trained)
+        with self.assertRaises(ValueError):
+            index.add_vectors(self.vectors)
+        with self.assertRaises(ValueError):
+            index.train(self.vectors[:8])
+
+        index.train(self.vectors[:1000])
+        index.add_vectors(self.vectors)
+        self.assertEqual(index.ntotal, 2000)
+
+    def test_train_from_chunks_skips_unusable_vectors(self):
+        corpus = Corpus.objects.create(name="c", corpus_type="t", path="/p", username="u")
+        document = Document.objects.create(corpus=corpus, name="d", description="d", num_chunks=0)
+        rows = [(self.vectors[i].tolist(), 'sig') for i in range(40)]
+        rows += [("legacy chunk text", ''), (self.vectors[0][:8].tolist(), 'sig'),
+                 ({}, 'sig'), (self.vectors[1].tolist(), 'other')]
+        Chunk.objects.bulk_create([Chunk(document=document, seq=i, chunk_txt="t", vector=vector,
+                                         vector_signature=signature)
+                                   for i, (vector, signature) in enumerate(rows)])
+        index = FAISSIndex(self.dimension, index_type='ivf_flat', nlist=4)
+        self.assertEqual(index.train_from_chunks(signature='sig'), 40)
+        self.assertTrue(index.is_trained)
+        unfiltered = FAISSIndex(self.dimension, index_type='ivf_flat', nlist=4)
+        self.assertEqual(unfiltered.train_from_chunks(), 41)
+
+    def test_ivf_nprobe_all_lists_is_exact(self):
+        index = FAISSIndex(self.dimension, index_type='ivf_flat', nlist=16)
+        index.train(self.vectors)
+        index.add_vectors(self.vectors)
+        _, found = index.search_vectors(self.vectors[:5], k=1, nprobe=16)
+        self.assertEqual(found[:, 0].tolist(), [0, 1, 2, 3, 4])
+
+    def test_hnsw_search(self):
+        index = FAISSIndex(self.dimension, index_type='hnsw', hnsw_m=16)
+        self.assertTrue(index.is_trained)
+        index.add_vectors(self.vectors)
+        _, found = index.search_vectors(self.vectors[7], k=3, ef_search=64)
+        self.assertEqual(found[0][0], 7)
+
+    def test_vectordb_index_options(self):
+        db = VectorDB(dimension=self.dimension, index_type='hnsw')
+        self.assertEqual(db.faiss_index.index_type, 'hnsw')
+
+    def test_measure_recall_latency(self):
+        from vector_db.benchmark import measure_recall_latency
+        results = measure_recall_latency(
+            self.vectors, self.vectors[:20],
+            [{'index_type': 'ivf_flat', 'nlist': 16, 'nprobe': 16},
+             {'index_type': 'hnsw', 'ef_search': 64}],
+            k=5)
+        self.assertEqual([row['index_type'] for row in results], ['flat', 'ivf_flat', 'hnsw'])
+        self.assertEqual(results[1]['recall'], 1.0)
+        self.assertGreater(results[2]['recall'], 0.8)
+        for row in results:
+            self.assertGreaterEqual(row['latency_ms'], 0)
+
+
+class PQIndexTests(TestCase):
+    '''Tests for the product-quantized index and exact re-ranking'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 32
+        self.vectors = rng.random((2000, self.dimension), dtype=np.float32)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def build(self, **options):
+        index = FAISSIndex(self.dimension, index_type='ivf_pq', nlist=8, pq_m=8, pq_nbits=4, **options)
+        index.train(self.vectors)
+        index.add_vectors(self.vectors)
+        return index
+
+    def test_pq_m_must_divide_dimension(self):
+        with self.assertRaises(ValueError):
+            FAISSIndex(self.dimension, index_type='ivf_pq', pq_m=7)
+
+    def test_code_size(self):
+        index = self.build()
+        self.assertEqual(index.code_size, 4)  # 8 codes of 4 bits
+        self.assertEqual(index.ntotal, 2000)
+
+    def test_opq_search(self):
+        index = self.build(opq=True)
+        _, found = index.search_vectors(self.vectors[:3], k=10, nprobe=8)
+        self.assertEqual(found.shape, (3, 10))
+
+    def test_rerank_returns_exact_distances(self):
+        index = self.build(vectors_path=os.path.join(self.tmpdir, 'vectors'), rerank_factor=8)
+        distances, found = index.search_vectors(self.vectors[:5], k=3, nprobe=8)
+        self.assertEqual(found[:, 0].tolist(), [0, 1, 2, 3, 4])
+        np.testing.assert_allclose(distances[:, 0], 0.0, atol=1e-6)
+        expected = ((self.vectors[found[0]] - self.vectors[0]) ** 2).sum(axis=1)
+        np.testing.assert_allclose(distances[0], expected, rtol=1e-5)
+
+    def test_vector_store_reopen(self):
+        from vector_db.vector_store import VectorStore
+        path = os.path.join(self.tmpdir, 'store')
+        store = VectorStore(path, self.dimension)
+        store.append([10, 11], self.vectors[:2])
+        store.append([10], self.vectors[5:6])
+
+        reopened = VectorStore(path, self.dimension)
+        self.assertEqual(len(reopened), 2)
+        np.testing.assert_array_equal(reopened.get([11, 10]), self.vectors[[1, 5]])
+
+
+class IDMappedIndexTests(TestCase):
+    '''Tests for chunk IDs stored in the FAISS index itself'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((300, self.dimension), dtype=np.float32)
+        self.chunk_ids = list(range(1000, 1300))
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_search_returns_chunk_ids(self):
+        index = FAISSIndex(self.dimension)
+        index.add_chunks(self.chunk_ids, self.vectors)
+        results = index.search_similar_chunks(self.vectors[5], k=2)
+        self.assertEqual(results[0][0], 1005)
+
+    def test_add_vectors_with_ids(self):
+        index = FAISSIndex(self.dimension)
+        index.add_vectors(self.vectors, batch_size=64, ids=self.chunk_ids)
+        _, found = index.search_vectors(self.vectors[7], k=1)
+        self.assertEqual(found[0][0], 1007)
+
+    def test_remove_and_upsert(self):
+        for index_type in ('flat', 'ivf_flat'):
+            index = FAISSIndex(self.dimension, index_type=index_type, nlist=4)
+            index.train(self.vectors)
+            index.add_chunks(self.chunk_ids, self.vectors)
+
+            self.assertEqual(index.remove_ids([1000, 1001, 9999]), 2)
+            self.assertEqual(index.ntotal, 298)
+            _, found = index.search_vectors(self.vectors[2], k=1, nprobe=4)
+            self.assertEqual(found[0][0], 1002)
+
+            replaced = index.upsert_chunks([1002, 1000], self.vectors[[0, 2]])
+            self.assertEqual(replaced, 1)
+            self.assertEqual(index.ntotal, 299)
+            _, found = index.search_vectors(self.vectors[0], k=1, nprobe=4)
+            self.assertEqual(found[0][0], 1002)
+
+    def test_hnsw_removal_unsupported(self):
+        index = FAISSIndex(self.dimension, index_type='hnsw')
+        index.add_chunks(self.chunk_ids, self.vectors)
+        self.assertEqual(index.remove_ids([5]), 0)
+        with self.assertRaises(ValueError):
+            index.remove_ids([1000])
+
+    def test_fewer_results_than_k(self):
+        index = FAISSIndex(self.dimension)
+        index.add_chunks([7, 8], self.vectors[:2])
+        self.assertEqual([chunk_id for chunk_id, _ in index.search_similar_chunks(self.vectors[0], k=5)], [7, 8])
+
+    def test_save_load_single_artifact(self):
+        path = os.path.join(self.tmpdir, 'index')
+        index = FAISSIndex(self.dimension)
+        index.add_chunks(self.chunk_ids, self.vectors)
+        index.remove_ids([1003])
+        index.save(path)
+        self.assertEqual(os.listdir(self.tmpdir), ['index.index'])
+
+        loaded = FAISSIndex(self.dimension)
+        loaded.load(path)
+        self.assertEqual(loaded.ntotal, 299)
+        self.assertEqual(loaded.search_similar_chunks(self.vectors[4], k=1)[0][0], 1004)
+
+    def test_load_legacy_chunk_ids(self):
+        path = os.path.join(self.tmpdir, 'legacy')
+        flat = faiss.IndexFlatL2(self.dimension)
+        flat.add(self.vectors)
+        faiss.write_index(flat, f"{path}.index")
+        np.save(f"{path}.chunk_ids", self.chunk_ids)
+
+        loaded = FAISSIndex(self.dimension)
+        loaded.load(path)
+        self.assertEqual(loaded.search_similar_chunks(self.vectors[9], k=1)[0][0], 1009)
+
+
+class BatchSearchTests(TestCase):
+    '''Tests for multi-query search'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((50, self.dimension), dtype=np.float32)
+
+    def test_index_batch_matches_single_queries(self):
+        index = FAISSIndex(self.dimension)
+        index.add_chunks(list(range(100, 150)), self.vectors)
+        batch = index.search_similar_chunks_batch(self.vectors[:4], k=3)
+        self.assertEqual(len(batch), 4)
+        for query, hits in zip(self.vectors[:4], batch):
+            single = index.search_similar_chunks(query, k=3)
+            self.assertEqual([chunk_id for chunk_id, _ in hits], [chunk_id for chunk_id, _ in single])
+
+    def test_vectordb_batch_with_vectors(self):
+        corpus = Corpus.objects.create(name="c", corpus_type="t", path="/p", username="u")
+        document = Document.objects.create(corpus=corpus, name="d", description="d", num_chunks=3)
+        chunks = [Chunk.objects.create(document=document, seq=i, chunk_txt=f"chunk {i}",
+                                       vector=self.vectors[i].tolist(), chunk_size=7)
+                  for i in range(3)]
+        db = VectorDB(dimension=self.dimension)
+        db.faiss_index.add_chunks([chunk.id for chunk in chunks], self.vectors[:3])
+
+        results = db.search_similar_batch(self.vectors[[2, 0]], k=2)
+        self.assertEqual([hits[0].id for hits in results], [chunks[2].id, chunks[0].id])
+        self.assertEqual(db.search_similar_batch(np.empty((0, self.dimension))), [])
+
+
+class MmapLoadTests(TestCase):
+    '''Tests for memory-mapped index loading'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((500, self.dimension), dtype=np.float32)
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'index')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_mmap_search_matches_heap_load(self):
+        for index_type in ('flat', 'ivf_flat'):
+            index = FAISSIndex(self.dimension, index_type=index_type, nlist=4)
+            index.train(self.vectors)
+            index.add_chunks(list(range(500)), self.vectors)
+            index.save(self.path)
+
+            mapped = FAISSIndex(self.dimension, index_type=index_type, nlist=4)
+            mapped.load(self.path, mmap=True)
+            self.assertEqual(mapped.ntotal, 500)
+            expected = index.search_similar_chunks_batch(self.vectors[:5], k=3)
+            self.assertEqual(mapped.search_similar_chunks_batch(self.vectors[:5], k=3), expected)
+
+    def test_mmap_index_is_read_only(self):
+        index = FAISSIndex(self.dimension)
+        index.add_chunks(list(range(500)), self.vectors)
+        index.save(self.path)
+        mapped = FAISSIndex(self.dimension)
+        mapped.load(self.path, mmap=True)
+        with self.assertRaises(ValueError):
+            mapped.add_chunks([500], self.vectors[:1])
+        with self.assertRaises(ValueError):
+            mapped.remove_ids([1])
+
+        mapped.load(self.path)
+        mapped.add_chunks([500], self.vectors[:1])
+        self.assertEqual(mapped.ntotal, 501)
+
+    def test_memory_report(self):
+        index = FAISSIndex(self.dimension)
+        self.assertFalse(index.memory_report()['mmap'])
+        index.add_chunks(list(range(500)), self.vectors)
+        index.save(self.path)
+        index.load(self.path, mmap=True)
+        report = index.memory_report()
+        self.assertTrue(report['mmap'])
+        self.assertEqual(report['file_bytes'], os.path.getsize(f"{self.path}.index"))
+        if os.path.exists('/proc/self/smaps'):
+            self.assertGreater(report['mapped_bytes'], 0)
+            self.assertLessEqual(report['resident_bytes'], report['mapped_bytes'])
+
+
+class SegmentedIndexTests(TestCase):
+    '''Tests for delta segments and compaction'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((400, self.dimension), dtype=np.float32)
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'segments')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def top_ids(self, index, queries, k=1):
+        return [[chunk_id for chunk_id, _ in hits]
+                for hits in index.search_similar_chunks_batch(queries, k)]
+
+    def test_save_writes_delta_and_manifest_only(self):
+        from vector_db.segments import SegmentedIndex
+        index = SegmentedIndex(self.path, self.dimension)
+        self.assertFalse(os.path.exists(self.path))
+        index.upsert_chunks(list(range(100)), self.vectors[:100])
+        index.save()
+        index.upsert_chunks(list(range(100, 200)), self.vectors[100:200])
+        index.save()
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['delta-000001.index', 'delta-000002.index', 'manifest.json'])
+
+        reopened = SegmentedIndex(self.path, self.dimension)
+        self.assertEqual(reopened.ntotal, 200)
+        self.assertEqual(self.top_ids(reopened, self.vectors[[5, 150]]), [[5], [150]])
+
+    def test_newer_segments_supersede_older(self):
+        from vector_db.segments import SegmentedIndex
+        index = SegmentedIndex(self.path, self.dimension)
+        index.upsert_chunks(list(range(100)), self.vectors[:100])
+        index.save()
+        # Chunk 3 moves to vector 300; chunk 4 is deleted
+        index.upsert_chunks([3], self.vectors[300:301])
+        index.remove_ids([4])
+        self.assertEqual(self.top_ids(index, self.vectors[[300]]), [[3]])
+        index.save()
+
+        reopened = SegmentedIndex(self.path, self.dimension)
+        hits = self.top_ids(reopened, self.vectors[[3, 4]], k=100)
+        self.assertNotIn(3, hits[0][:1])
+        self.assertNotIn(4, hits[1])
+        self.assertEqual(len(hits[1]), 99)
+        self.assertEqual(self.top_ids(reopened, self.vectors[[300]]), [[3]])
+
+    def test_compaction(self):
+        from vector_db.segments import SegmentedIndex
+        for index_type in ('flat', 'ivf_flat', 'hnsw'):
+            shutil.rmtree(self.path, ignore_errors=True)
+            index = SegmentedIndex(self.path, self.dimension, max_deltas=100,
+                                   index_type=index_type, nlist=4)
+            index.upsert_chunks(list(range(200)), self.vectors[:200])
+            index.save()
+            self.assertTrue(index.compact())
+            index.upsert_chunks([3], self.vectors[300:301])
+            index.remove_ids([4])
+            index.save()
+            self.assertTrue(index.compact())
+            self.assertFalse(index.compact())
+
+            self.assertEqual(sorted(os.listdir(self.path)), ['base-000004.index', 'manifest.json'])
+            reopened = SegmentedIndex(self.path, self.dimension, index_type=index_type, nlist=4)
+            self.assertEqual(reopened.ntotal, 199)
+            hits = self.top_ids(reopened, self.vectors[[300, 4]], k=5)
+            self.assertEqual(hits[0][0], 3)
+            self.assertNotIn(4, hits[1])
+
+    def test_untrained_base_waits_for_enough_vectors(self):
+        from vector_db.segments import SegmentedIndex
+        index = SegmentedIndex(self.path, self.dimension, index_type='ivf_flat', nlist=50)
+        index.upsert_chunks(list(range(10)), self.vectors[:10])
+        index.save()
+        self.assertFalse(index.compact())
+        self.assertEqual(self.top_ids(index, self.vectors[[7]]), [[7]])
+
+    def test_background_compaction(self):
+        from vector_db.segments import SegmentedIndex
+        index = SegmentedIndex(self.path, self.dimension, max_deltas=2)
+        index.upsert_chunks([1], self.vectors[1:2])
+        index.save()
+        index.upsert_chunks([2], self.vectors[2:3])
+        index.save()
+        index._compactor.join(timeout=10)
+        self.assertEqual(sorted(os.listdir(self.path)), ['base-000003.index', 'manifest.json'])
+        self.assertEqual(self.top_ids(index, self.vectors[[1, 2]]), [[1], [2]])
+
+    def test_save_during_compaction_keeps_deltas(self):
+        from vector_db.segments import SegmentedIndex
+        index = SegmentedIndex(self.path, self.dimension, max_deltas=100)
+        index.upsert_chunks([0, 1], self.vectors[:2])
+        index.save()
+        writing_base, release = threading.Event(), threading.Event()
+        write_index = index._write_index
+
+        def slow_write_index(segment, name):
+            if name.startswith('base'):
+                writing_base.set()
+                release.wait(timeout=10)
+            write_index(segment, name)
+
+        index._write_index = slow_write_index
+        compactor = index.compact_in_background()
+        self.assertTrue(writing_base.wait(timeout=10))
+        for chunk_id in (100, 101):
+            index.upsert_chunks([chunk_id], self.vectors[chunk_id:chunk_id + 1])
+            index.save()
+        release.set()
+        compactor.join(timeout=10)
+        index.upsert_chunks([200], self.vectors[200:201])
+        index.save()
+
+        reopened = SegmentedIndex(self.path, self.dimension)
+        self.assertEqual(reopened.ntotal, 5)
+        self.assertEqual(self.top_ids(reopened, self.vectors[[0, 1, 100, 101, 200]]),
+                         [[0], [1], [100], [101], [200]])
+
+    def test_imports_legacy_single_file_index(self):
+        from vector_db.segments import SegmentedIndex
+        legacy_path = os.path.join(self.tmpdir, 'faiss_index')
+        legacy = FAISSIndex(self.dimension)
+        legacy.add_chunks(list(range(50)), self.vectors[:50])
+        legacy.save(legacy_path)
+
+        index = SegmentedIndex(self.path, self.dimension, legacy_path=legacy_path)
+        self.assertEqual(index.ntotal, 50)
+        self.assertEqual(self.top_ids(index, self.vectors[[7]]), [[7]])
+        self.assertEqual(sorted(os.listdir(self.path)), ['base-000000.index', 'manifest.json'])
+
+
+class ShardManagerTests(TestCase):
+    '''Tests for per-corpus shards'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((300, self.dimension), dtype=np.float32)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def manager(self, **options):
+        from vector_db.shards import ShardManager
+        return ShardManager(self.tmpdir, self.dimension, **options)
+
+    def test_sub_shards_by_size(self):
+        shards = self.manager(max_shard_vectors=40)
+        shards.upsert(1, list(range(100)), self.vectors[:100])
+        shards.upsert(2, list(range(100, 110)), self.vectors[100:110])
+        self.assertEqual(shards.shard_names(1), ['shard-0000', 'shard-0001', 'shard-0002'])
+        self.assertEqual(shards.shard_names(2), ['shard-0000'])
+        self.assertEqual(shards.corpus_ids(), [1, 2])
+
+    def test_fan_out_matches_single_index(self):
+        shards = self.manager(max_shard_vectors=50)
+        shards.upsert(1, list(range(150)), self.vectors[:150])
+        shards.upsert(2, list(range(150, 300)), self.vectors[150:])
+        single = FAISSIndex(self.dimension)
+        single.add_chunks(list(range(300)), self.vectors)
+
+        queries = self.vectors[[3, 160, 299]]
+        merged = shards.search(queries, k=5)
+        expected = single.search_similar_chunks_batch(queries, k=5)
+        self.assertEqual([[chunk_id for chunk_id, _ in hits] for hits in merged],
+                         [[chunk_id for chunk_id, _ in hits] for hits in expected])
+
+        only_first = shards.search(queries, k=5, corpus_ids=[1])
+        self.assertTrue(all(chunk_id < 150 for hits in only_first for chunk_id, _ in hits))
+
+    def test_upsert_replaces_across_sub_shards(self):
+        shards = self.manager(max_shard_vectors=40)
+        shards.upsert(1, list(range(100)), self.vectors[:100])
+        shards.upsert(1, [5], self.vectors[200:201])
+        self.assertEqual(shards.search(self.vectors[200], k=1)[0][0][0], 5)
+        self.assertNotEqual(shards.search(self.vectors[5], k=1)[0][0][0], 5)
+
+    def test_upsert_loads_only_shards_holding_the_chunks(self):
+        shards = self.manager(max_shard_vectors=40)
+        shards.upsert(1, list(range(100)), self.vectors[:100])
+        shards.save()
+
+        reopened = self.manager(max_shard_vectors=40)
+        reopened.upsert(1, [200], self.vectors[200:201])
+        self.assertEqual(list(reopened._loaded), [(1, 'shard-0002')])
+        reopened.upsert(1, [5], self.vectors[201:202])
+        self.assertEqual(sorted(reopened._loaded), [(1, 'shard-0000'), (1, 'shard-0002')])
+        self.assertEqual(reopened.remove(1, [5, 6, 999]), 2)
+        self.assertEqual(reopened.search(self.vectors[200], k=1)[0][0][0], 200)
+
+    def test_ivf_shard_buffers_until_enough_training_vectors(self):
+        shards = self.manager(index_type='ivf_flat', nlist=4)
+        self.assertEqual(shards.train_size, 156)
+        shards.upsert(1, [0, 1, 2], self.vectors[:3])
+        shards.save()
+        path = os.path.join(self.tmpdir, 'corpus-1', 'shard-0000')
+        self.assertTrue(os.path.exists(f"{path}.buffer.index"))
+        self.assertEqual(shards.search(self.vectors[2], k=1)[0][0][0], 2)
+
+        reopened = self.manager(index_type='ivf_flat', nlist=4)
+        for start in range(3, 300, 40):
+            end = min(start + 40, 300)
+            reopened.upsert(1, list(range(start, end)), self.vectors[start:end])
+        index = reopened._shard((1, 'shard-0000'))
+        self.assertEqual(index.index_type, 'ivf_flat')
+        self.assertEqual(index.ntotal, 300)
+        self.assertTrue(os.path.exists(f"{path}.index"))
+        self.assertFalse(os.path.exists(f"{path}.buffer.index"))
+        hits = reopened.search(self.vectors[[0, 299]], k=1, nprobe=4)
+        self.assertEqual([row[0][0] for row in hits], [0, 299])
+
+    def test_search_waits_for_shard_writes(self):
+        from vector_db.shards import ReadWriteLock
+        lock = ReadWriteLock()
+        wrote = threading.Event()
+
+        def write():
+            with lock.writing():
+                wrote.set()
+
+        with lock.reading():
+            writer = threading.Thread(target=write)
+            writer.start()
+            self.assertFalse(wrote.wait(timeout=0.1))
+        writer.join(timeout=5)
+        self.assertTrue(wrote.is_set())
+
+    def test_lru_eviction_under_budget(self):
+        shards = self.manager(max_shard_vectors=50, memory_budget_bytes=2 * 50 * (16 * 4 + 8))
+        for corpus_id in range(4):
+            start = corpus_id * 50
+            shards.upsert(corpus_id, list(range(start, start + 50)), self.vectors[start:start + 50])
+        self.assertLessEqual(shards.stats()['loaded_shards'], 2)
+        self.assertGreater(shards.evictions, 0)
+
+        # Evicted shards were saved and reload transparently
+        hits = shards.search(self.vectors[[0, 120]], k=1)
+        self.assertEqual([row[0][0] for row in hits], [0, 120])
+        shards.save()
+
+        reopened = self.manager()
+        self.assertEqual(reopened.search(self.vectors[[199]], k=1)[0][0][0], 199)
+
+    def test_sharded_vectordb_search(self):
+        from vector_db.shards import ShardedVectorDB
+        corpus = Corpus.objects.create(name="c", corpus_type="t", path="/p", username="u")
+        document = Document.objects.create(corpus=corpus, name="d", description="d", num_chunks=2)
+        chunks = [Chunk.objects.create(document=document, seq=i, chunk_txt=f"chunk {i}",
+                                       vector=self.vectors[i].tolist(), chunk_size=7)
+                  for i in range(2)]
+        with self.settings(VECTOR_DB_SETTINGS={'shards': {'root': self.tmpdir}}):
+            db = ShardedVectorDB(dimension=self.dimension)
+        db.shards.upsert(corpus.id, [chunk.id for chunk in chunks], self.vectors[:2])
+        results = db.search_similar_batch(self.vectors[[1]], k=1, corpus_ids=[corpus.id])
+        self.assertEqual(results[0][0].id, chunks[1].id)
+
+
+class FilteredSearchTests(TestCase):
+    '''Tests for filter predicates pushed into the FAISS search'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((1000, self.dimension), dtype=np.float32)
+        self.ids = np.arange(1000, 2000)
+
+    def expected(self, queries, allowed, k):
+        mask = np.isin(self.ids, allowed)
+        distances = ((self.vectors[mask][None, :, :] - queries[:, None, :]) ** 2).sum(axis=2)
+        return self.ids[mask][np.argsort(distances, axis=1)[:, :k]].tolist()
+
+    def test_id_selector_bitmap_and_batch(self):
+        from vector_db.faiss_db import id_selector
+        dense, _ = id_selector(np.arange(0, 100, 2))
+        sparse, _ = id_selector(np.array([3, 10 ** 9]))
+        self.assertIsInstance(dense, faiss.IDSelectorBitmap)
+        self.assertIsInstance(sparse, faiss.IDSelectorBatch)
+        self.assertTrue(dense.is_member(4))
+        self.assertFalse(dense.is_member(5))
+        self.assertTrue(sparse.is_member(10 ** 9))
+
+    def test_exactly_k_hits_for_every_index_type(self):
+        queries = self.vectors[:5]
+        for allowed in (self.ids[::10], self.ids[[7, 300, 512, 900, 999, 42]]):
+            for index_type in ('flat', 'ivf_flat', 'hnsw'):
+                index = FAISSIndex(self.dimension, index_type=index_type, nlist=16)
+                index.train(self.vectors)
+                index.add_chunks(self.ids.tolist(), self.vectors)
+                D, I = index.search_filtered(queries, 5, allowed)
+                self.assertTrue(np.isin(I, allowed).all(), index_type)
+                # IVF with one probe is approximate but still fills every row
+                _, I = index.search_filtered(queries, 5, allowed, nprobe=16)
+                self.assertEqual(I.tolist(), self.expected(queries, allowed, 5), index_type)
+
+    def test_fewer_matches_than_k(self):
+        index = FAISSIndex(self.dimension, index_type='ivf_flat', nlist=16)
+        index.train(self.vectors)
+        index.add_chunks(self.ids.tolist(), self.vectors)
+        hits = index.search_similar_chunks(self.vectors[0], k=5, allowed_ids=[1500, 1600, 5])
+        self.assertEqual(sorted(chunk_id for chunk_id, _ in hits), [1500, 1600])
+        self.assertEqual(index.search_similar_chunks(self.vectors[0], k=5, allowed_ids=[]), [])
+
+    def test_segmented_filtered_search(self):
+        from vector_db.segments import SegmentedIndex
+        tmpdir = tempfile.mkdtemp()
+        try:
+            index = SegmentedIndex(os.path.join(tmpdir, 'segments'), self.dimension)
+            index.upsert_chunks(self.ids[:500].tolist(), self.vectors[:500])
+            index.save()
+            index.upsert_chunks(self.ids[500:].tolist(), self.vectors[500:])
+            index.remove_ids([1010])
+            allowed = self.ids[::10]
+            hits = index.search_similar_chunks_batch(self.vectors[:3], k=4, allowed_ids=allowed)
+            expected = self.expected(self.vectors[:3], np.setdiff1d(allowed, [1010]), 4)
+            self.assertEqual([[chunk_id for chunk_id, _ in row] for row in hits], expected)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_filter_chunk_ids(self):
+        import datetime
+        from django.utils import timezone
+        from vector_db.faiss_db import filter_chunk_ids
+        corpora = [Corpus.objects.create(name=f"c{i}", corpus_type="t", path="/p", username="u")
+                   for i in range(2)]
+        documents = [Document.objects.create(corpus=corpus, name="d", description="d", num_chunks=2)
+                     for corpus in corpora]
+        chunks = [Chunk.objects.create(document=document, seq=i, chunk_txt=f"chunk {i}",
+                                       vector=[0.0], chunk_size=7)
+                  for document in documents for i in range(2)]
+        Chunk.objects.filter(id=chunks[0].id).update(created_at=timezone.now() - datetime.timedelta(days=30))
+
+        self.assertIsNone(filter_chunk_ids())
+        self.assertEqual(sorted(filter_chunk_ids(corpus_ids=[corpora[1].id])),
+                         [chunks[2].id, chunks[3].id])
+        self.assertEqual(sorted(filter_chunk_ids(document_ids=[documents[0].id],
+                                                 created_after=timezone.now() - datetime.timedelta(days=1))),
+                         [chunks[1].id])
+        self.assertEqual(len(filter_chunk_ids(corpus_ids=[])), 0)
+
+
+class ChunkHydrationTests(TestCase):
+    '''Tests for bulk, order-preserving hydration of search hits'''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dimension = 16
+        self.vectors = rng.random((4, self.dimension), dtype=np.float32)
+        corpus = Corpus.objects.create(name="c", corpus_type="t", path="/p", username="u")
+        document = Document.objects.create(corpus=corpus, name="d", description="d", num_chunks=4)
+        self.chunks = [Chunk.objects.create(document=document, seq=i, chunk_txt=f"chunk {i}",
+                                            vector=self.vectors[i].tolist(), chunk_size=7)
+                       for i in range(4)]
+
+    def test_one_query_in_rank_order(self):
+        from vector_db.faiss_db import load_chunks
+        ids = [chunk.id for chunk in self.chunks]
+        hits = [[(ids[2], 0.5), (ids[0], 1.5), (999999, 2.0), (ids[1], 3.0)], [(ids[2], 0.25)]]
+        with self.assertNumQueries(1):
+            rows = load_chunks(hits)
+            corpus_names = [chunk.document.corpus.name for chunk in rows[0]]
+        self.assertEqual([[chunk.id for chunk in row] for row in rows], [[ids[2], ids[0], ids[1]], [ids[2]]])
+        self.assertEqual([chunk.distance for chunk in rows[0]], [0.5, 1.5, 3.0])
+        self.assertEqual(rows[1][0].distance, 0.25)
+        self.assertEqual(corpus_names, ["c"] * 3)
+        self.assertEqual(rows[0][0].get_deferred_fields(), {'chunk_txt', 'vector'})
+
+    def test_requested_fields_are_loaded(self):
+        from vector_db.faiss_db import load_chunks
+        rows = load_chunks([[(self.chunks[0].id, 0.0)]], with_text=True)
+        self.assertEqual(rows[0][0].get_deferred_fields(), {'vector'})
+        with self.assertNumQueries(0):
+            self.assertEqual(rows[0][0].chunk_txt, "chunk 0")
+
+    def test_vectordb_search_returns_scores(self):
+        db = VectorDB(dimension=self.dimension)
+        db.faiss_index.add_chunks([chunk.id for chunk in self.chunks], self.vectors)
+        with self.assertNumQueries(1):
+            results = db.search_similar_batch(self.vectors[[3]], k=2)
+        self.assertEqual(results[0][0].id, self.chunks[3].id)
+        self.assertAlmostEqual(results[0][0].distance, 0.0, places=5)
+        self.assertLessEqual(results[0][0].distance, results[0][1].distance)
+
+    def test_search_tuning_reaches_the_index(self):
+        from vector_db.shards import ShardedVectorDB
+        ids = [chunk.id for chunk in self.chunks]
+        with self.settings(VECTOR_DB_SETTINGS={}):
+            db = VectorDB(dimension=self.dimension, index_type='ivf_flat', nlist=4)
+        db.faiss_index.train(self.vectors)
+        db.faiss_index.add_chunks(ids, self.vectors)
+        with mock.patch.object(db.faiss_index, 'search_similar_chunks_batch',
+                               wraps=db.faiss_index.search_similar_chunks_batch) as search:
+            results = db.search_similar_batch(self.vectors[[3]], k=1, nprobe=4)
+        self.assertEqual(search.call_args.args[2:4], (4, None))
+        self.assertEqual(results[0][0].id, ids[3])
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with self.settings(VECTOR_DB_SETTINGS={'shards': {'root': tmpdir}}):
+            sharded = ShardedVectorDB(dimension=self.dimension, index_type='hnsw')
+        sharded.shards.upsert(self.chunks[0].document.corpus_id, ids, self.vectors)
+        with mock.patch.object(sharded.shards, 'search', wraps=sharded.shards.search) as search:
+            results = sharded.search_similar_batch(self.vectors[[1]], k=1, ef_search=64)
+        self.assertEqual(search.call_args.args[3:5], (None, 64))
+        self.assertEqual(results[0][0].id, ids[1])
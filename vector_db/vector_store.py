@@ -0,0 +1,69 @@
+'''Original (uncompressed) vectors kept on disk for exact re-ranking'''
+# vector_db/vector_store.py
+import os
+from typing import Dict, Iterable, Optional
+import numpy as np
+from numpy.typing import NDArray
+
+
+class VectorStore:
+    """Append-only float32 vectors on disk, read back through a memory map
+
+    Vectors go to ``{path}.f32`` and their IDs to ``{path}.ids`` as raw
+    little-endian rows. When an ID is written again the newest row wins, so
+    only the rows touched by a query are paged in, never the whole file.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._rows: Dict[int, int] = {}
+        self._count = 0
+        self._map: Optional[np.memmap] = None
+        if os.path.exists(self._ids_file):
+            ids = np.fromfile(self._ids_file, dtype='<i8')
+            self._count = len(ids)
+            self._rows = {int(id_): row for row, id_ in enumerate(ids)}
+
+    @property
+    def _vectors_file(self) -> str:
+        return f"{self.path}.f32"
+
+    @property
+    def _ids_file(self) -> str:
+        return f"{self.path}.ids"
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, id_: int) -> bool:
+        return int(id_) in self._rows
+
+    def append(self, ids: Iterable[int], vectors: NDArray) -> None:
+        ids = np.asarray(list(ids), dtype='<i8')
+        vectors = np.ascontiguousarray(vectors, dtype='<f4')
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Vectors must have dimension {self.dimension}")
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        with open(self._vectors_file, 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(self._ids_file, 'ab') as f:
+            f.write(ids.tobytes())
+        for offset, id_ in enumerate(ids.tolist()):
+            self._rows[id_] = self._count + offset
+        self._count += len(ids)
+
+    def get(self, ids: Iterable[int]) -> NDArray:
+        """Vectors for ids, in order
+
+        Raises:
+            KeyError: If an ID was never stored
+        """
+        rows = [self._rows[int(id_)] for id_ in ids]
+        if not rows:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        if self._map is None or len(self._map) < self._count:
+            self._map = np.memmap(self._vectors_file, dtype='<f4', mode='r',
+                                  shape=(self._count, self.dimension))
+        return np.asarray(self._map[rows], dtype=np.float32)